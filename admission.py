@@ -0,0 +1,147 @@
+import math
+import threading
+import time
+from flask import g, request
+
+# Admission control: every request is classed as a cheap lookup, a heavy scan
+# or a write, and each class has its own concurrency limit and bounded wait
+# queue. A request that cannot get a slot before its queue deadline, or finds
+# the queue full, is shed with 503 so cheap traffic keeps flowing while
+# expensive scans are throttled. Limits are per worker process.
+#
+# Each limit adapts to observed latency (AIMD): it shrinks by 10% while the
+# smoothed latency is above the class target and grows by about one slot per
+# limit's worth of completed requests while the class is saturated but fast.
+
+# Endpoints whose cost is not what their method and URL shape suggest. None
+# exempts the endpoint: long-lived streams and long polls hold no database
+# connection while they wait.
+ROUTE_CLASSES = {
+    'api.index': 'lookup',
+    'api.filter_catalog': 'lookup',
+    'api.get_session': 'lookup',
+    'api.get_active_contracts': 'lookup',
+    'api.batch_active_contracts': 'lookup',
+    # Coalesced: a herd of identical searches costs one query, and followers
+    # must not queue behind the scan limit while they wait for it
+    'api.search_books': 'lookup',
+    'api.feedback_trending': 'lookup',
+    'api.bulk_delete_books': 'scan',
+    'api.customer_profiles': 'scan',
+    # Password hashing is bounded and shed by the hash pool, and logins hold
+    # no connection while they wait for it; their latency would otherwise
+    # drive the write limit down
+    'api.login': None,
+    'api.get_events': None,
+    'api.get_changes': None,
+    'api.admission_stats': None,
+    'api.coalescing_stats': None,
+    'api.outbox_gaps': None,
+}
+
+class Overloaded(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+# Writes by method; GETs that address one row (have URL parameters) are
+# lookups, collection GETs are scans. Unrouted requests (404, 405) take no slot.
+def route_class(endpoint, method, view_args):
+    if endpoint is None:
+        return None
+    if endpoint in ROUTE_CLASSES:
+        return ROUTE_CLASSES[endpoint]
+    if method not in ('GET', 'HEAD'):
+        return 'write'
+    return 'lookup' if view_args else 'scan'
+
+class Limiter:
+    def __init__(self, name, limit, min_limit, max_limit, queue, queue_timeout, target_latency):
+        self.name = name
+        self.limit = float(limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.target_latency = target_latency
+        self.latency = target_latency
+        self.inflight = 0
+        self.waiting = 0
+        self.decreased = 0.0
+        self.counters = {'admitted': 0, 'queued': 0, 'shed_full': 0, 'shed_timeout': 0}
+        self.condition = threading.Condition()
+
+    def retry_after(self):
+        return max(1, math.ceil(self.latency * (self.waiting + 1) / self.limit))
+
+    def acquire(self):
+        with self.condition:
+            if self.inflight < int(self.limit) and not self.waiting:
+                self.inflight += 1
+                self.counters['admitted'] += 1
+                return
+            if self.waiting >= self.queue:
+                self.counters['shed_full'] += 1
+                raise Overloaded(f'Too many {self.name} requests', self.retry_after())
+            self.counters['queued'] += 1
+            self.waiting += 1
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.inflight >= int(self.limit):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.counters['shed_timeout'] += 1
+                        raise Overloaded(f'Timed out waiting for a {self.name} slot', self.retry_after())
+                    self.condition.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.inflight += 1
+            self.counters['admitted'] += 1
+
+    def release(self, latency):
+        with self.condition:
+            saturated = self.inflight >= int(self.limit)
+            self.inflight -= 1
+            self.latency = 0.9 * self.latency + 0.1 * latency
+            now = time.monotonic()
+            if self.latency > self.target_latency:
+                # At most one decrease per target interval so a burst of slow
+                # completions does not collapse the limit to its floor
+                if now - self.decreased >= self.target_latency:
+                    self.limit = max(self.min_limit, self.limit * 0.9)
+                    self.decreased = now
+            elif saturated or self.waiting:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.condition.notify()
+
+    def stats(self):
+        with self.condition:
+            return {
+                'limit': int(self.limit),
+                'inflight': self.inflight,
+                'waiting': self.waiting,
+                'latency': round(self.latency, 4),
+                **self.counters,
+            }
+
+def init_admission(app):
+    limiters = {
+        name: Limiter(name, **settings) for name, settings in app.config['ADMISSION_CLASSES'].items()
+    }
+    app.extensions['admission'] = limiters
+
+    @app.before_request
+    def admit():
+        name = route_class(request.endpoint, request.method, request.view_args)
+        if name is None or name not in limiters:
+            return None
+        limiters[name].acquire()
+        g.admission = (limiters[name], time.monotonic())
+        return None
+
+    @app.teardown_request
+    def release(exc):
+        admitted = g.pop('admission', None)
+        if admitted is not None:
+            limiter, started = admitted
+            limiter.release(time.monotonic() - started)
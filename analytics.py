@@ -0,0 +1,106 @@
+from datetime import date
+from sqlalchemy import Date, cast, func, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, OrderSupplies, SuppliesDaily, SuppliesMonthly
+
+GRAINS = {'day': SuppliesDaily, 'month': SuppliesMonthly}
+DIMENSIONS = ('supplier', 'store')
+
+def as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+def month_start(value):
+    return value.replace(day=1)
+
+def month_end(value):
+    following = date(value.year + value.month // 12, value.month % 12 + 1, 1)
+    return date.fromordinal(following.toordinal() - 1)
+
+# INSERT for the running dialect, which supports ON CONFLICT DO UPDATE
+def insert_for(model):
+    insert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+    return insert(model.__table__)
+
+def upsert_delta(model, period, supplierid, storeid, quantity, orders):
+    table = model.__table__
+    key = {'period': period, 'supplierid': supplierid or 0, 'storeid': storeid or 0}
+    stmt = insert_for(model).values(**key, quantity=quantity, orders=orders)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['period', 'supplierid', 'storeid'],
+        set_={'quantity': table.c.quantity + stmt.excluded.quantity, 'orders': table.c.orders + stmt.excluded.orders},
+    )
+    db.session.execute(stmt)
+    # A group that lost its last order is dropped, as a rebuild would not have it
+    if orders < 0:
+        db.session.execute(
+            table.delete().where(*(table.c[name] == value for name, value in key.items()), table.c.orders == 0)
+        )
+
+# Incremental maintenance, called by the ordersupplies write paths inside their
+# transaction: sign=1 for the new state of an order, sign=-1 for the old one.
+def record_supply(order, sign=1):
+    orderdate = as_date(order.suppliesorderdate)
+    quantity = sign * order.ordersupplyquantity
+    upsert_delta(SuppliesDaily, orderdate, order.supplierid, order.storeid, quantity, sign)
+    upsert_delta(SuppliesMonthly, month_start(orderdate), order.supplierid, order.storeid, quantity, sign)
+
+def truncate_month(column):
+    if db.engine.dialect.name == 'postgresql':
+        return cast(func.date_trunc(literal_column("'month'"), column), Date)
+    return func.date(column, 'start of month')
+
+# Bulk rebuild for backfills. The range is widened to whole months so the
+# monthly rows can be recomputed from complete daily rows.
+def rebuild_rollups(start=None, end=None):
+    orders = OrderSupplies.__table__
+    daily = SuppliesDaily.__table__
+    monthly = SuppliesMonthly.__table__
+    if start is not None:
+        start = month_start(start)
+    if end is not None:
+        end = month_end(end)
+
+    def in_range(column):
+        conditions = []
+        if start is not None:
+            conditions.append(column >= start)
+        if end is not None:
+            conditions.append(column <= end)
+        return conditions
+
+    db.session.execute(daily.delete().where(*in_range(daily.c.period)))
+    db.session.execute(monthly.delete().where(*in_range(monthly.c.period)))
+    supplier = func.coalesce(orders.c.supplierid, 0)
+    store = func.coalesce(orders.c.storeid, 0)
+    db.session.execute(daily.insert().from_select(
+        ['period', 'supplierid', 'storeid', 'quantity', 'orders'],
+        select(orders.c.suppliesorderdate, supplier, store, func.sum(orders.c.ordersupplyquantity), func.count())
+        .where(*in_range(orders.c.suppliesorderdate))
+        .group_by(orders.c.suppliesorderdate, supplier, store),
+    ))
+    month = truncate_month(daily.c.period)
+    db.session.execute(monthly.insert().from_select(
+        ['period', 'supplierid', 'storeid', 'quantity', 'orders'],
+        select(month, daily.c.supplierid, daily.c.storeid, func.sum(daily.c.quantity), func.sum(daily.c.orders))
+        .where(*in_range(daily.c.period))
+        .group_by(month, daily.c.supplierid, daily.c.storeid),
+    ))
+    db.session.commit()
+
+def query_supplies(grain, group_by, start=None, end=None):
+    table = GRAINS[grain].__table__
+    columns = {'supplier': table.c.supplierid, 'store': table.c.storeid}
+    keys = [table.c.period] + [columns[name] for name in group_by]
+    stmt = (
+        select(*keys, func.sum(table.c.quantity).label('quantity'), func.sum(table.c.orders).label('orders'))
+        .group_by(*keys)
+        .order_by(*keys)
+    )
+    if start is not None:
+        stmt = stmt.where(table.c.period >= (month_start(start) if grain == 'month' else start))
+    if end is not None:
+        stmt = stmt.where(table.c.period <= end)
+    return [
+        {**{key: value for key, value in row.items() if key != 'period'}, 'period': row['period'].isoformat()}
+        for row in db.session.execute(stmt).mappings()
+    ]
@@ -1,14 +1,107 @@
-from flask import Flask, jsonify, request, render_template_string
+import secrets
+from datetime import date, timedelta
+import click
+from flask import Flask, Blueprint, Response, current_app, jsonify, request, render_template_string
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
-from config import Config
-from models import db, Manager, Publisher, Book, BookStore, Author, BookAuthors, BookGenre, BookBookGenre, Supplier, SupplierBooks, OrderSupplies, Customer, OnlineAccount, BookReviews, CustomerFeedback, Staff, Inventory, Contracts, Wishlist, WishlistItems, init_db
+from sqlalchemy.orm.exc import StaleDataError
+from config import Config, DevelopmentConfig
+from models import db, Manager, Publisher, Book, BookStore, Author, BookAuthors, BookGenre, BookBookGenre, Supplier, SupplierBooks, OrderSupplies, Customer, OnlineAccount, BookReviews, CustomerFeedback, Staff, Inventory, Contracts, Wishlist, WishlistItems, ReorderSuggestion, init_db
+from migrations import upgrade
+from concurrency import ConflictError, parse_if_match, compare_and_swap, increment, run_with_retry
+from bulk import bulk_delete
+from cache import LRUCache
+from compression import init_compression
+from admission import Overloaded, init_admission
+from coalesce import coalesced, flights
+from formats import collection_response, init_formats
+from catalog import catalog, filter_books, SORT_COLUMNS
+from facets import FACETS, compute_facets
+from analytics import DIMENSIONS, GRAINS, as_date, query_supplies, rebuild_rollups, record_supply
+from reorder import compute_reorders
+from trending import current_week, rebuild_feedback_terms, record_feedback, trending_terms, week_of
+from profiles import SECTIONS, load_profiles
+from auth import PoolBusy, check_in_pool, current_session, hash_in_pool, issue_token
+from outbox import compact, open_gaps, record_deleted, record_row, wait_for_changes
+from events import broker, relay, replay, stream
+from contracts import contract_index, active_contracts
 
-app = Flask(__name__)
-app.config.from_object(Config)
+bp = Blueprint('api', __name__)
 
-db.init_app(app)
+# Application factory: nothing touches the database at import or creation time.
+# Schema setup is the explicit `flask --app app init-db` command.
+def create_app(config=Config):
+    app = Flask(__name__)
+    app.config.from_object(config)
+    # Session tokens are signed with SECRET_KEY, so a well-known default would
+    # let anyone forge them. Development and test apps get a throwaway key.
+    if not app.config.get('SECRET_KEY'):
+        if not (app.config.get('TESTING') or app.config.get('DEBUG')):
+            raise RuntimeError('SECRET_KEY is not set')
+        app.config['SECRET_KEY'] = secrets.token_hex(32)
 
-@app.route('/')
+    db.init_app(app)
+    init_compression(app)
+    init_formats(app)
+    init_admission(app)
+    app.register_error_handler(Overloaded, lambda e: busy(e, e.retry_after))
+    # Facet counts keyed by the normalized filter, short-lived
+    app.extensions['facet_cache'] = LRUCache(app.config['FACET_CACHE_SIZE'], app.config['FACET_CACHE_TTL'])
+    app.register_blueprint(bp)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        init_db()
+        upgrade()
+        click.echo('Database initialized')
+
+    @app.cli.command('rebuild-rollups')
+    @click.option('--from', 'start', default=None, help='First order date (YYYY-MM-DD)')
+    @click.option('--to', 'end', default=None, help='Last order date (YYYY-MM-DD)')
+    def rebuild_rollups_command(start, end):
+        rebuild_rollups(as_date(start) if start else None, as_date(end) if end else None)
+        click.echo('Supply rollups rebuilt')
+
+    @app.cli.command('rebuild-feedback-terms')
+    @click.option('--from', 'start', default=None, help='First feedback date (YYYY-MM-DD)')
+    @click.option('--to', 'end', default=None, help='Last feedback date (YYYY-MM-DD)')
+    def rebuild_feedback_terms_command(start, end):
+        rebuild_feedback_terms(
+            as_date(start) if start else None, as_date(end) if end else None, app.config['FEEDBACK_BACKFILL_BATCH']
+        )
+        click.echo('Feedback term counts rebuilt')
+
+    @app.cli.command('compute-reorders')
+    def compute_reorders_command():
+        settings = {
+            'window_days': app.config['REORDER_WINDOW_DAYS'],
+            'lead_days': app.config['REORDER_LEAD_DAYS'],
+            'safety_days': app.config['REORDER_SAFETY_DAYS'],
+            'cover_days': app.config['REORDER_COVER_DAYS'],
+            'store_batch': app.config['REORDER_STORE_BATCH'],
+        }
+        click.echo(f'{compute_reorders(settings)} reorder suggestions written')
+
+    @app.cli.command('compact-outbox')
+    @click.option('--days', type=int, default=None, help='Only compact records older than this many days')
+    def compact_outbox_command(days):
+        days = app.config['OUTBOX_COMPACT_AFTER_DAYS'] if days is None else days
+        click.echo(f'{compact(timedelta(days=days))} superseded outbox records removed')
+
+    return app
+
+# Runs before workers accept traffic (in the pre-fork master, see wsgi.py).
+# Pooled connections are disposed afterwards so forked workers never share
+# the master's sockets; each worker's pool reconnects lazily.
+def warm_up(app):
+    with app.app_context():
+        db.session.execute(text('SELECT 1'))
+        catalog.load()
+        contract_index.load()
+        db.session.remove()
+        db.engine.dispose()
+
+@bp.route('/')
 def index():
     buttons = [
         {"name": "Managers", "endpoint": "/managers"},
@@ -83,7 +176,7 @@ def sql_builder(table, filters):
     return query
 
 # Endpoint to run the SQL builder query
-@app.route('/sql_builder', methods=['GET'])
+@bp.route('/sql_builder', methods=['GET'])
 def run_sql_builder():
     table = request.args.get('table')
     filters = request.args.to_dict(flat=True)
@@ -92,21 +185,128 @@ def run_sql_builder():
     result = db.session.execute(query)
     return jsonify([dict(row) for row in result])
 
+# Optimistic update of a versioned row. With If-Match only that version is
+# accepted (412 otherwise); without it, or with If-Match: *, conflicts are
+# retried, then 409. An unparseable If-Match is a 400.
+def versioned_update(model, pk, values, not_found, updated):
+    try:
+        expected = parse_if_match(request.headers.get('If-Match'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    attempts = 1 if expected is not None else None
+
+    try:
+        version = run_with_retry(lambda: compare_and_swap(model, pk, expected, **values), attempts)
+    except ConflictError as e:
+        return jsonify({'message': str(e)}), 412 if expected is not None else 409
+    if version is None:
+        return jsonify({'message': not_found}), 404
+    response = jsonify({'message': updated, 'version': version})
+    response.headers['ETag'] = f'"{version}"'
+    return response
+
+# Deleting a versioned row checks its version, so a concurrent update or
+# delete fails the flush with StaleDataError, answered with 409
+def versioned_delete(row, deleted):
+    db.session.delete(row)
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'message': f'{row.__table__.name} was modified concurrently'}), 409
+    return jsonify({'message': deleted})
+
+# Change feed: /changes?since=<seq>&limit=500&wait=20 long-polls for up to
+# `wait` seconds when nothing newer than `since` is available yet
+@bp.route('/changes', methods=['GET'])
+def get_changes():
+    config = current_app.config
+    since = request.args.get('since', 0, type=int)
+    limit = min(max(request.args.get('limit', 500, type=int), 1), config['CHANGES_MAX_LIMIT'])
+    wait = min(max(request.args.get('wait', 0, type=float), 0), config['CHANGES_MAX_WAIT'])
+    changes = wait_for_changes(since, limit, config['OUTBOX_MAX_TRANSACTION_AGE'], wait, config['CHANGES_POLL_INTERVAL'])
+    return jsonify({'changes': changes, 'next': changes[-1]['seq'] if changes else since})
+
+# Outbox sequence numbers this worker's readers are waiting on (see outbox.follow)
+@bp.route('/outbox/gaps', methods=['GET'])
+def outbox_gaps():
+    return jsonify(open_gaps())
+
+# Per-class admission limits, queues and shed counters for this worker
+@bp.route('/admission', methods=['GET'])
+def admission_stats():
+    return jsonify({name: limiter.stats() for name, limiter in current_app.extensions['admission'].items()})
+
+# Requests served per database execution for the coalesced endpoints
+@bp.route('/coalescing', methods=['GET'])
+def coalescing_stats():
+    return jsonify(flights.stats())
+
+TOPIC_PREFIXES = ('store:', 'isbn:')
+
+# Server-Sent Events: /events?topic=store:3&topic=isbn:9780000000001&topic=prices
+# Reconnecting clients resume from Last-Event-ID (header or lastEventId query
+# parameter); a `resync` event means the client has to refetch its state.
+@bp.route('/events', methods=['GET'])
+def get_events():
+    config = current_app.config
+    topics = set(request.args.getlist('topic'))
+    if not topics:
+        return jsonify({'message': 'At least one topic is required'}), 400
+    if len(topics) > config['EVENTS_MAX_TOPICS']:
+        return jsonify({'message': f'At most {config["EVENTS_MAX_TOPICS"]} topics per subscription'}), 400
+    invalid = sorted(t for t in topics if t != 'prices' and not (t.startswith(TOPIC_PREFIXES) and t.partition(':')[2]))
+    if invalid:
+        return jsonify({'message': f'Unknown topics: {", ".join(invalid)}'}), 400
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    if last_event_id is not None and not last_event_id.isdigit():
+        return jsonify({'message': 'Last-Event-ID must be an event id'}), 400
+
+    relay.ensure_started(current_app._get_current_object())
+    subscriber = broker.subscribe(topics, config['EVENTS_BACKLOG'])
+    try:
+        if last_event_id is None:
+            # New subscribers start at the head: once the relay has caught up,
+            # whatever it published before is older than the subscription
+            db.session.remove()
+            relay.caught_up.wait(config['EVENTS_CATCH_UP_TIMEOUT'])
+            replayed, position, complete = [], relay.seq, True
+        else:
+            replayed, position, complete = replay(
+                int(last_event_id), subscriber.topics, config['EVENTS_REPLAY_LIMIT'],
+                config['OUTBOX_MAX_TRANSACTION_AGE'], config['EVENTS_RELAY_BATCH'],
+            )
+    except Exception:
+        broker.unsubscribe(subscriber)
+        raise
+    # The stream outlives the request's database session; release it now
+    db.session.remove()
+    response = Response(
+        stream(subscriber, replayed, position, complete, config['EVENTS_HEARTBEAT'], config['EVENTS_RETRY']),
+        mimetype='text/event-stream',
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(lambda: broker.unsubscribe(subscriber))
+    return response
+
 # Endpoint to select books by author
-@app.route('/books/author/<author_id>', methods=['GET'])
+@bp.route('/books/author/<author_id>', methods=['GET'])
+@coalesced('book', 'bookauthors')
 def get_books_by_author(author_id):
-    books = db.session.query(Book).join(BookAuthors).filter(BookAuthors.AuthorNumber == author_id).all()
+    books = db.session.query(Book).join(BookAuthors).filter(BookAuthors.authornumber == author_id).all()
     return jsonify(query_to_dict(books))
 
 # Endpoint to search books based on keywords
-@app.route('/books/search', methods=['GET'])
+@bp.route('/books/search', methods=['GET'])
+@coalesced('book')
 def search_books():
     keywords = request.args.get('keywords')
-    books = Book.query.filter(Book.BookName.ilike(f'%{keywords}%')).all()
+    books = Book.query.filter(Book.bookname.ilike(f'%{keywords}%')).all()
     return jsonify(query_to_dict(books))
 
 # Endpoint to wishlist a book
-@app.route('/wishlist/add', methods=['POST'])
+@bp.route('/wishlist/add', methods=['POST'])
 def add_to_wishlist():
     data = request.get_json()
     wishlist_item = WishlistItems(
@@ -119,51 +319,53 @@ def add_to_wishlist():
     return jsonify({'message': 'Book added to wishlist successfully'}), 201
 
 # DML: Update Book Price
-@app.route('/books/update/<isbn>', methods=['PUT'])
+@bp.route('/books/update/<isbn>', methods=['PUT'])
 def update_book(isbn):
     data = request.get_json()
-    book = Book.query.filter_by(isbn=isbn).first()
-    if not book:
-        return jsonify({'message': 'Book not found'}), 404
-
-    book.price = data['price']
-    db.session.commit()
-    return jsonify({'message': 'Book price updated successfully'})
+    return versioned_update(Book, isbn, {'price': data['price']}, 'Book not found', 'Book price updated successfully')
 
 # TCL: Combine Several SQL Statements
-@app.route('/transaction', methods=['POST'])
+@bp.route('/transaction', methods=['POST'])
 def perform_transaction():
+    try:
+        expected = parse_if_match(request.headers.get('If-Match'))
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     try:
         data = request.get_json()
 
-        # Update book price
-        book = Book.query.filter_by(isbn=data['isbn']).first()
-        if not book:
-            return jsonify({'message': 'Book not found'}), 404
-        book.price = data['price']
+        def apply():
+            # Update book price
+            version = compare_and_swap(Book, data['isbn'], expected, price=data['price'])
+            if version is None:
+                return None
 
-        # Add to wishlist
-        wishlist_item = WishlistItems(
-            wishlistitemid=data['wishlistitemid'],
-            isbn=data['isbn'],
-            quantity=data['quantity']
-        )
-        db.session.add(wishlist_item)
+            # Add to wishlist
+            wishlist_item = WishlistItems(
+                wishlistitemid=data['wishlistitemid'],
+                isbn=data['isbn'],
+                quantity=data['quantity']
+            )
+            db.session.add(wishlist_item)
+            return version
 
-        # Commit the transaction
-        db.session.commit()
+        # Commit the transaction, retrying the whole unit on a version conflict
+        version = run_with_retry(apply, 1 if expected is not None else None)
+        if version is None:
+            return jsonify({'message': 'Book not found'}), 404
 
-        return jsonify({'message': 'Transaction completed successfully'})
+        return jsonify({'message': 'Transaction completed successfully', 'version': version})
+    except ConflictError as e:
+        return jsonify({'message': str(e)}), 412 if expected is not None else 409
     except SQLAlchemyError as e:
         db.session.rollback()
         return jsonify({'message': str(e)}), 500
 
 # Existing endpoints to get data from tables
-@app.route('/managers', methods=['GET', 'POST', 'PUT'])
+@bp.route('/managers', methods=['GET', 'POST', 'PUT'])
 def manage_managers():
     if request.method == 'GET':
-        managers = Manager.query.all()
-        return jsonify([manager.to_dict() for manager in managers])
+        return collection_response(Manager)
     if request.method == 'POST':
         data = request.get_json()
         manager = Manager(
@@ -182,7 +384,7 @@ def manage_managers():
         db.session.commit()
         return jsonify({'message': 'Manager updated successfully'})
 
-@app.route('/managers/<int:managerid>', methods=['DELETE'])
+@bp.route('/managers/<int:managerid>', methods=['DELETE'])
 def delete_manager(managerid):
     manager = Manager.query.filter_by(managerid=managerid).first()
     if not manager:
@@ -191,11 +393,10 @@ def delete_manager(managerid):
     db.session.commit()
     return jsonify({'message': 'Manager deleted successfully'})
 
-@app.route('/publishers', methods=['GET', 'POST', 'PUT'])
+@bp.route('/publishers', methods=['GET', 'POST', 'PUT'])
 def manage_publishers():
     if request.method == 'GET':
-        publishers = Publisher.query.all()
-        return jsonify([publisher.to_dict() for publisher in publishers])
+        return collection_response(Publisher)
     if request.method == 'POST':
         data = request.get_json()
         publisher = Publisher(
@@ -220,7 +421,7 @@ def manage_publishers():
         db.session.commit()
         return jsonify({'message': 'Publisher updated successfully'})
 
-@app.route('/publishers/<string:idpublisher>', methods=['DELETE'])
+@bp.route('/publishers/<string:idpublisher>', methods=['DELETE'])
 def delete_publisher(idpublisher):
     publisher = Publisher.query.filter_by(idpublisher=idpublisher).first()
     if not publisher:
@@ -229,11 +430,10 @@ def delete_publisher(idpublisher):
     db.session.commit()
     return jsonify({'message': 'Publisher deleted successfully'})
 
-@app.route('/books', methods=['GET', 'POST', 'PUT'])
+@bp.route('/books', methods=['GET', 'POST', 'PUT'])
 def manage_books():
     if request.method == 'GET':
-        books = Book.query.all()
-        return jsonify([book.to_dict() for book in books])
+        return collection_response(Book)
     if request.method == 'POST':
         data = request.get_json()
         book = Book(
@@ -249,31 +449,96 @@ def manage_books():
         return jsonify({'message': 'Book added successfully'}), 201
     if request.method == 'PUT':
         data = request.get_json()
-        book = Book.query.filter_by(isbn=data['isbn']).first()
-        if not book:
-            return jsonify({'message': 'Book not found'}), 404
-        book.bookname = data['bookname']
-        book.publicationyear = data['publicationyear']
-        book.pages = data['pages']
-        book.price = data['price']
-        book.idpublisher = data['idpublisher']
-        db.session.commit()
-        return jsonify({'message': 'Book updated successfully'})
+        values = {
+            'bookname': data['bookname'],
+            'publicationyear': data['publicationyear'],
+            'pages': data['pages'],
+            'price': data['price'],
+            'idpublisher': data['idpublisher']
+        }
+        return versioned_update(Book, data['isbn'], values, 'Book not found', 'Book updated successfully')
 
-@app.route('/books/<string:isbn>', methods=['DELETE'])
+@bp.route('/books/<string:isbn>', methods=['DELETE'])
 def delete_book(isbn):
     book = Book.query.filter_by(isbn=isbn).first()
     if not book:
         return jsonify({'message': 'Book not found'}), 404
-    db.session.delete(book)
-    db.session.commit()
-    return jsonify({'message': 'Book deleted successfully'})
+    return versioned_delete(book, 'Book deleted successfully')
+
+# Bulk delete books matching a filter together with their dependent rows, e.g.
+# {"filter": {"idpublisher": "P1", "publicationyear": {"lt": 2000}}, "dry_run": true}
+@bp.route('/books/bulk_delete', methods=['POST'])
+def bulk_delete_books():
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({'message': 'The request body must be a JSON object'}), 400
+    dry_run = data.get('dry_run', False)
+    if not isinstance(dry_run, bool):
+        return jsonify({'message': 'dry_run must be true or false'}), 400
+    try:
+        counts = bulk_delete(Book, data.get('filter'), dry_run=dry_run, before_delete=record_deleted)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({'message': str(e)}), 500
+    message = 'Dry run completed' if dry_run else 'Books deleted successfully'
+    return jsonify({'message': message, 'dry_run': dry_run, 'counts': counts})
+
+# Catalog filter shared by /books/filter and /books/facets:
+# price_min/max, year_min/max, pages_min/max, publisher=P1,P2, genre=1,4
+def parse_catalog_filter(args):
+    ranges = {}
+    for name, kind in (('price', float), ('year', int), ('pages', int)):
+        low, high = args.get(f'{name}_min'), args.get(f'{name}_max')
+        ranges[name] = (kind(low) if low else None, kind(high) if high else None)
+    publishers = sorted({p for p in args.get('publisher', '').split(',') if p})
+    genres = sorted({int(g) for g in args.get('genre', '').split(',') if g})
+    return ranges, publishers, genres
+
+# Range/set filtering over the in-memory catalog snapshot, e.g.
+# /books/filter?price_min=5&price_max=20&year_min=1990&genre=1,4&sort=price&order=desc
+@bp.route('/books/filter', methods=['GET'])
+def filter_catalog():
+    args = request.args
+    try:
+        ranges, publishers, genres = parse_catalog_filter(args)
+    except ValueError:
+        return jsonify({'message': 'Invalid filter value'}), 400
+    sort = args.get('sort', 'isbn')
+    if sort not in SORT_COLUMNS:
+        return jsonify({'message': f'sort must be one of {", ".join(SORT_COLUMNS)}'}), 400
+    page = max(args.get('page', 1, type=int), 1)
+    per_page = min(max(args.get('per_page', 50, type=int), 1), current_app.config['CATALOG_MAX_PAGE_SIZE'])
+
+    snapshot = catalog.refresh(current_app.config['CATALOG_REFRESH_INTERVAL'])
+    total, isbns = filter_books(snapshot, ranges, publishers, genres, sort, args.get('order') == 'desc', page, per_page)
+    return jsonify({'total': total, 'page': page, 'per_page': per_page, 'isbns': isbns})
 
-@app.route('/bookstores', methods=['GET', 'POST', 'PUT'])
+# Counts per genre, publisher, price bucket and decade for the current filter,
+# computed in one query, e.g. /books/facets?facets=genre,decade&price_max=20
+@bp.route('/books/facets', methods=['GET'])
+def book_facets():
+    try:
+        ranges, publishers, genres = parse_catalog_filter(request.args)
+    except ValueError:
+        return jsonify({'message': 'Invalid filter value'}), 400
+    requested = request.args.get('facets')
+    facets = tuple(f for f in FACETS if f in requested.split(',')) if requested else FACETS
+    if not facets:
+        return jsonify({'message': f'facets must be any of {", ".join(FACETS)}'}), 400
+
+    key = (facets, tuple(sorted(ranges.items())), tuple(publishers), tuple(genres))
+    cache = current_app.extensions['facet_cache']
+    counts = cache.get(key)
+    if counts is None:
+        counts = compute_facets(facets, ranges, publishers, genres, current_app.config['FACET_PRICE_EDGES'])
+        cache.put(key, counts)
+    return jsonify(counts)
+
+@bp.route('/bookstores', methods=['GET', 'POST', 'PUT'])
 def manage_bookstores():
     if request.method == 'GET':
-        bookstores = BookStore.query.all()
-        return jsonify([bookstore.to_dict() for bookstore in bookstores])
+        return collection_response(BookStore)
     if request.method == 'POST':
         data = request.get_json()
         bookstore = BookStore(
@@ -294,7 +559,7 @@ def manage_bookstores():
         db.session.commit()
         return jsonify({'message': 'Bookstore updated successfully'})
 
-@app.route('/bookstores/<int:storeid>', methods=['DELETE'])
+@bp.route('/bookstores/<int:storeid>', methods=['DELETE'])
 def delete_bookstore(storeid):
     bookstore = BookStore.query.filter_by(storeid=storeid).first()
     if not bookstore:
@@ -303,11 +568,10 @@ def delete_bookstore(storeid):
     db.session.commit()
     return jsonify({'message': 'Bookstore deleted successfully'})
 
-@app.route('/authors', methods=['GET', 'POST', 'PUT'])
+@bp.route('/authors', methods=['GET', 'POST', 'PUT'])
 def manage_authors():
     if request.method == 'GET':
-        authors = Author.query.all()
-        return jsonify([author.to_dict() for author in authors])
+        return collection_response(Author)
     if request.method == 'POST':
         data = request.get_json()
         author = Author(
@@ -330,7 +594,7 @@ def manage_authors():
         db.session.commit()
         return jsonify({'message': 'Author updated successfully'})
 
-@app.route('/authors/<int:authornumber>', methods=['DELETE'])
+@bp.route('/authors/<int:authornumber>', methods=['DELETE'])
 def delete_author(authornumber):
     author = Author.query.filter_by(authornumber=authornumber).first()
     if not author:
@@ -339,11 +603,10 @@ def delete_author(authornumber):
     db.session.commit()
     return jsonify({'message': 'Author deleted successfully'})
 
-@app.route('/bookauthors', methods=['GET', 'POST', 'PUT'])
+@bp.route('/bookauthors', methods=['GET', 'POST', 'PUT'])
 def manage_bookauthors():
     if request.method == 'GET':
-        bookauthors = BookAuthors.query.all()
-        return jsonify([bookauthor.to_dict() for bookauthor in bookauthors])
+        return collection_response(BookAuthors)
     if request.method == 'POST':
         data = request.get_json()
         bookauthor = BookAuthors(
@@ -363,7 +626,7 @@ def manage_bookauthors():
         db.session.commit()
         return jsonify({'message': 'Book Author updated successfully'})
 
-@app.route('/bookauthors/<string:isbn>/<int:authornumber>', methods=['DELETE'])
+@bp.route('/bookauthors/<string:isbn>/<int:authornumber>', methods=['DELETE'])
 def delete_bookauthor(isbn, authornumber):
     bookauthor = BookAuthors.query.filter_by(isbn=isbn, authornumber=authornumber).first()
     if not bookauthor:
@@ -372,11 +635,10 @@ def delete_bookauthor(isbn, authornumber):
     db.session.commit()
     return jsonify({'message': 'Book Author deleted successfully'})
 
-@app.route('/bookgenres', methods=['GET', 'POST', 'PUT'])
+@bp.route('/bookgenres', methods=['GET', 'POST', 'PUT'])
 def manage_bookgenres():
     if request.method == 'GET':
-        bookgenres = BookGenre.query.all()
-        return jsonify([bookgenre.to_dict() for bookgenre in bookgenres])
+        return collection_response(BookGenre)
     if request.method == 'POST':
         data = request.get_json()
         bookgenre = BookGenre(
@@ -397,7 +659,7 @@ def manage_bookgenres():
         db.session.commit()
         return jsonify({'message': 'Book Genre updated successfully'})
 
-@app.route('/bookgenres/<int:genreid>', methods=['DELETE'])
+@bp.route('/bookgenres/<int:genreid>', methods=['DELETE'])
 def delete_bookgenre(genreid):
     bookgenre = BookGenre.query.filter_by(genreid=genreid).first()
     if not bookgenre:
@@ -406,11 +668,10 @@ def delete_bookgenre(genreid):
     db.session.commit()
     return jsonify({'message': 'Book Genre deleted successfully'})
 
-@app.route('/bookbookgenres', methods=['GET', 'POST', 'PUT'])
+@bp.route('/bookbookgenres', methods=['GET', 'POST', 'PUT'])
 def manage_bookbookgenres():
     if request.method == 'GET':
-        bookbookgenres = BookBookGenre.query.all()
-        return jsonify([bookbookgenre.to_dict() for bookbookgenre in bookbookgenres])
+        return collection_response(BookBookGenre)
     if request.method == 'POST':
         data = request.get_json()
         bookbookgenre = BookBookGenre(
@@ -430,7 +691,7 @@ def manage_bookbookgenres():
         db.session.commit()
         return jsonify({'message': 'Book Book Genre updated successfully'})
 
-@app.route('/bookbookgenres/<string:isbn>/<int:genreid>', methods=['DELETE'])
+@bp.route('/bookbookgenres/<string:isbn>/<int:genreid>', methods=['DELETE'])
 def delete_bookbookgenre(isbn, genreid):
     bookbookgenre = BookBookGenre.query.filter_by(isbn=isbn, genreid=genreid).first()
     if not bookbookgenre:
@@ -439,11 +700,10 @@ def delete_bookbookgenre(isbn, genreid):
     db.session.commit()
     return jsonify({'message': 'Book Book Genre deleted successfully'})
 
-@app.route('/suppliers', methods=['GET', 'POST', 'PUT'])
+@bp.route('/suppliers', methods=['GET', 'POST', 'PUT'])
 def manage_suppliers():
     if request.method == 'GET':
-        suppliers = Supplier.query.all()
-        return jsonify([supplier.to_dict() for supplier in suppliers])
+        return collection_response(Supplier)
     if request.method == 'POST':
         data = request.get_json()
         supplier = Supplier(
@@ -466,7 +726,7 @@ def manage_suppliers():
         db.session.commit()
         return jsonify({'message': 'Supplier updated successfully'})
 
-@app.route('/suppliers/<int:supplierid>', methods=['DELETE'])
+@bp.route('/suppliers/<int:supplierid>', methods=['DELETE'])
 def delete_supplier(supplierid):
     supplier = Supplier.query.filter_by(supplierid=supplierid).first()
     if not supplier:
@@ -475,11 +735,10 @@ def delete_supplier(supplierid):
     db.session.commit()
     return jsonify({'message': 'Supplier deleted successfully'})
 
-@app.route('/supplierbooks', methods=['GET', 'POST', 'PUT'])
+@bp.route('/supplierbooks', methods=['GET', 'POST', 'PUT'])
 def manage_supplierbooks():
     if request.method == 'GET':
-        supplierbooks = SupplierBooks.query.all()
-        return jsonify([supplierbook.to_dict() for supplierbook in supplierbooks])
+        return collection_response(SupplierBooks)
     if request.method == 'POST':
         data = request.get_json()
         supplierbook = SupplierBooks(
@@ -499,7 +758,7 @@ def manage_supplierbooks():
         db.session.commit()
         return jsonify({'message': 'Supplier Book updated successfully'})
 
-@app.route('/supplierbooks/<int:supplierid>/<string:isbn>', methods=['DELETE'])
+@bp.route('/supplierbooks/<int:supplierid>/<string:isbn>', methods=['DELETE'])
 def delete_supplierbook(supplierid, isbn):
     supplierbook = SupplierBooks.query.filter_by(supplierid=supplierid, isbn=isbn).first()
     if not supplierbook:
@@ -508,11 +767,10 @@ def delete_supplierbook(supplierid, isbn):
     db.session.commit()
     return jsonify({'message': 'Supplier Book deleted successfully'})
 
-@app.route('/ordersupplies', methods=['GET', 'POST', 'PUT'])
+@bp.route('/ordersupplies', methods=['GET', 'POST', 'PUT'])
 def manage_ordersupplies():
     if request.method == 'GET':
-        ordersupplies = OrderSupplies.query.all()
-        return jsonify([ordersupply.to_dict() for ordersupply in ordersupplies])
+        return collection_response(OrderSupplies)
     if request.method == 'POST':
         data = request.get_json()
         ordersupply = OrderSupplies(
@@ -523,6 +781,7 @@ def manage_ordersupplies():
             storeid=data['storeid']
         )
         db.session.add(ordersupply)
+        record_supply(ordersupply)
         db.session.commit()
         return jsonify({'message': 'Order Supply added successfully'}), 201
     if request.method == 'PUT':
@@ -530,27 +789,68 @@ def manage_ordersupplies():
         ordersupply = OrderSupplies.query.filter_by(ordersuppliesid=data['ordersuppliesid']).first()
         if not ordersupply:
             return jsonify({'message': 'Order Supply not found'}), 404
+        record_supply(ordersupply, -1)
         ordersupply.supplierid = data['supplierid']
         ordersupply.suppliesorderdate = data['suppliesorderdate']
         ordersupply.ordersupplyquantity = data['ordersupplyquantity']
         ordersupply.storeid = data['storeid']
+        record_supply(ordersupply)
         db.session.commit()
         return jsonify({'message': 'Order Supply updated successfully'})
 
-@app.route('/ordersupplies/<int:ordersuppliesid>', methods=['DELETE'])
+@bp.route('/ordersupplies/<int:ordersuppliesid>', methods=['DELETE'])
 def delete_ordersupply(ordersuppliesid):
     ordersupply = OrderSupplies.query.filter_by(ordersuppliesid=ordersuppliesid).first()
     if not ordersupply:
         return jsonify({'message': 'Order Supply not found'}), 404
     db.session.delete(ordersupply)
+    record_supply(ordersupply, -1)
     db.session.commit()
     return jsonify({'message': 'Order Supply deleted successfully'})
 
-@app.route('/customers', methods=['GET', 'POST', 'PUT'])
+# Daily reorder list for a store, written by `flask compute-reorders`
+@bp.route('/stores/<int:storeid>/reorder', methods=['GET'])
+def store_reorders(storeid):
+    suggestions = (
+        ReorderSuggestion.query.filter_by(storeid=storeid)
+        .order_by((ReorderSuggestion.quantity - ReorderSuggestion.reorderpoint).asc())
+        .all()
+    )
+    return jsonify([suggestion.to_dict() for suggestion in suggestions])
+
+# Supply rollups, e.g. /analytics/supplies?group_by=supplier,store&grain=month&from=2024-01-01&to=2024-12-31
+@bp.route('/analytics/supplies', methods=['GET'])
+def supplies_analytics():
+    grain = request.args.get('grain', 'month')
+    if grain not in GRAINS:
+        return jsonify({'message': f'grain must be one of {", ".join(GRAINS)}'}), 400
+    group_by = [name for name in request.args.get('group_by', '').split(',') if name]
+    if any(name not in DIMENSIONS for name in group_by):
+        return jsonify({'message': f'group_by must be any of {", ".join(DIMENSIONS)}'}), 400
+    try:
+        start = as_date(request.args['from']) if request.args.get('from') else None
+        end = as_date(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'message': 'from and to must be YYYY-MM-DD dates'}), 400
+    return jsonify(query_supplies(grain, group_by, start, end))
+
+# Most frequent feedback terms of the week containing `week` (default: this
+# week), e.g. /analytics/feedback/trending?week=2024-03-14&top=20
+@bp.route('/analytics/feedback/trending', methods=['GET'])
+def feedback_trending():
+    try:
+        week = week_of(request.args['week']) if request.args.get('week') else current_week()
+    except ValueError:
+        return jsonify({'message': 'week must be a YYYY-MM-DD date'}), 400
+    top = request.args.get('top', 20, type=int)
+    if top < 1 or top > current_app.config['FEEDBACK_TRENDING_MAX_TOP']:
+        return jsonify({'message': f'top must be between 1 and {current_app.config["FEEDBACK_TRENDING_MAX_TOP"]}'}), 400
+    return jsonify(trending_terms(week, top))
+
+@bp.route('/customers', methods=['GET', 'POST', 'PUT'])
 def manage_customers():
     if request.method == 'GET':
-        customers = Customer.query.all()
-        return jsonify([customer.to_dict() for customer in customers])
+        return collection_response(Customer)
     if request.method == 'POST':
         data = request.get_json()
         customer = Customer(
@@ -571,7 +871,7 @@ def manage_customers():
         db.session.commit()
         return jsonify({'message': 'Customer updated successfully'})
 
-@app.route('/customers/<int:customernumber>', methods=['DELETE'])
+@bp.route('/customers/<int:customernumber>', methods=['DELETE'])
 def delete_customer(customernumber):
     customer = Customer.query.filter_by(customernumber=customernumber).first()
     if not customer:
@@ -580,19 +880,94 @@ def delete_customer(customernumber):
     db.session.commit()
     return jsonify({'message': 'Customer deleted successfully'})
 
-@app.route('/onlineaccounts', methods=['GET', 'POST', 'PUT'])
+# Section limits come from PROFILE_LIMITS and may be lowered per request with
+# ?reviews_limit=5&feedback_limit=5&accounts_limit=..&wishlist_limit=..
+def profile_limits(args):
+    limits = dict(current_app.config['PROFILE_LIMITS'])
+    for name in SECTIONS:
+        requested = args.get(f'{name}_limit', type=int)
+        if requested is not None:
+            limits[name] = max(0, min(requested, limits[name]))
+    return limits
+
+# Customer 360 in one round trip
+@bp.route('/customers/<int:customernumber>/profile', methods=['GET'])
+def customer_profile(customernumber):
+    profiles = load_profiles([customernumber], profile_limits(request.args))
+    if not profiles:
+        return jsonify({'message': 'Customer not found'}), 404
+    return jsonify(profiles[0])
+
+# Batched variant: {"customernumbers": [1, 2, 3]}
+@bp.route('/customers/profiles', methods=['POST'])
+def customer_profiles():
+    data = request.get_json()
+    customernumbers = data.get('customernumbers', []) if isinstance(data, dict) else None
+    if not isinstance(customernumbers, list) or not all(
+        isinstance(number, int) and not isinstance(number, bool) for number in customernumbers
+    ):
+        return jsonify({'message': 'customernumbers must be a list of customer numbers'}), 400
+    if len(customernumbers) > current_app.config['PROFILE_MAX_BATCH']:
+        return jsonify({'message': f"At most {current_app.config['PROFILE_MAX_BATCH']} customers per call"}), 400
+    if not customernumbers:
+        return jsonify([])
+    return jsonify(load_profiles(customernumbers, profile_limits(request.args)))
+
+def busy(error, retry_after=1):
+    response = jsonify({'message': str(error)})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+# Password login. Verification runs in the hashing process pool; plaintext
+# legacy passwords are upgraded to a hash on a successful login.
+@bp.route('/login', methods=['POST'])
+def login():
+    data = request.get_json()
+    account = OnlineAccount.query.filter_by(username=data.get('username')).first()
+    stored = account.password if account else None
+    claims = {'accountid': account.accountid, 'customernumber': account.customernumber} if account else None
+    # Don't hold a pooled connection while the hash is being checked
+    db.session.rollback()
+    try:
+        matches, needs_rehash = check_in_pool(stored, data.get('password', ''))
+        if matches and needs_rehash:
+            upgraded = hash_in_pool(data['password'])
+            OnlineAccount.query.filter_by(accountid=claims['accountid'], password=stored).update(
+                {'password': upgraded}, synchronize_session=False
+            )
+            record_row(OnlineAccount.__table__, claims['accountid'])
+            db.session.commit()
+    except PoolBusy as e:
+        return busy(e)
+    if not matches:
+        return jsonify({'message': 'Invalid username or password'}), 401
+    return jsonify({'token': issue_token(claims), **claims})
+
+# Claims of the bearer token, checked from its signature alone
+@bp.route('/session', methods=['GET'])
+def get_session():
+    claims = current_session()
+    if claims is None:
+        return jsonify({'message': 'Invalid or expired session'}), 401
+    return jsonify(claims)
+
+@bp.route('/onlineaccounts', methods=['GET', 'POST', 'PUT'])
 def manage_onlineaccounts():
     if request.method == 'GET':
-        onlineaccounts = OnlineAccount.query.all()
-        return jsonify([onlineaccount.to_dict() for onlineaccount in onlineaccounts])
+        return collection_response(OnlineAccount, exclude=('password',))
     if request.method == 'POST':
         data = request.get_json()
+        try:
+            password = hash_in_pool(data['password'])
+        except PoolBusy as e:
+            return busy(e)
         onlineaccount = OnlineAccount(
             accountid=data['accountid'],
             customernumber=data['customernumber'],
             customeremail=data['customeremail'],
             username=data['username'],
-            password=data['password'],
+            password=password,
             accountstatus=data['accountstatus']
         )
         db.session.add(onlineaccount)
@@ -603,15 +978,19 @@ def manage_onlineaccounts():
         onlineaccount = OnlineAccount.query.filter_by(accountid=data['accountid']).first()
         if not onlineaccount:
             return jsonify({'message': 'Online Account not found'}), 404
+        try:
+            password = hash_in_pool(data['password'])
+        except PoolBusy as e:
+            return busy(e)
         onlineaccount.customernumber = data['customernumber']
         onlineaccount.customeremail = data['customeremail']
         onlineaccount.username = data['username']
-        onlineaccount.password = data['password']
+        onlineaccount.password = password
         onlineaccount.accountstatus = data['accountstatus']
         db.session.commit()
         return jsonify({'message': 'Online Account updated successfully'})
 
-@app.route('/onlineaccounts/<int:accountid>', methods=['DELETE'])
+@bp.route('/onlineaccounts/<int:accountid>', methods=['DELETE'])
 def delete_onlineaccount(accountid):
     onlineaccount = OnlineAccount.query.filter_by(accountid=accountid).first()
     if not onlineaccount:
@@ -620,11 +999,10 @@ def delete_onlineaccount(accountid):
     db.session.commit()
     return jsonify({'message': 'Online Account deleted successfully'})
 
-@app.route('/bookreviews', methods=['GET', 'POST', 'PUT'])
+@bp.route('/bookreviews', methods=['GET', 'POST', 'PUT'])
 def manage_bookreviews():
     if request.method == 'GET':
-        bookreviews = BookReviews.query.all()
-        return jsonify([bookreview.to_dict() for bookreview in bookreviews])
+        return collection_response(BookReviews)
     if request.method == 'POST':
         data = request.get_json()
         bookreview = BookReviews(
@@ -649,7 +1027,7 @@ def manage_bookreviews():
         db.session.commit()
         return jsonify({'message': 'Book Review updated successfully'})
 
-@app.route('/bookreviews/<int:reviewid>', methods=['DELETE'])
+@bp.route('/bookreviews/<int:reviewid>', methods=['DELETE'])
 def delete_bookreview(reviewid):
     bookreview = BookReviews.query.filter_by(reviewid=reviewid).first()
     if not bookreview:
@@ -658,11 +1036,10 @@ def delete_bookreview(reviewid):
     db.session.commit()
     return jsonify({'message': 'Book Review deleted successfully'})
 
-@app.route('/customerfeedback', methods=['GET', 'POST', 'PUT'])
+@bp.route('/customerfeedback', methods=['GET', 'POST', 'PUT'])
 def manage_customerfeedback():
     if request.method == 'GET':
-        customerfeedback = CustomerFeedback.query.all()
-        return jsonify([feedback.to_dict() for feedback in customerfeedback])
+        return collection_response(CustomerFeedback)
     if request.method == 'POST':
         data = request.get_json()
         feedback = CustomerFeedback(
@@ -672,6 +1049,7 @@ def manage_customerfeedback():
             feedbacktext=data['feedbacktext']
         )
         db.session.add(feedback)
+        record_feedback(feedback)
         db.session.commit()
         return jsonify({'message': 'Customer Feedback added successfully'}), 201
     if request.method == 'PUT':
@@ -679,26 +1057,28 @@ def manage_customerfeedback():
         feedback = CustomerFeedback.query.filter_by(feedbackid=data['feedbackid']).first()
         if not feedback:
             return jsonify({'message': 'Customer Feedback not found'}), 404
+        record_feedback(feedback, -1)
         feedback.customernumber = data['customernumber']
         feedback.feedbackdate = data['feedbackdate']
         feedback.feedbacktext = data['feedbacktext']
+        record_feedback(feedback)
         db.session.commit()
         return jsonify({'message': 'Customer Feedback updated successfully'})
 
-@app.route('/customerfeedback/<int:feedbackid>', methods=['DELETE'])
+@bp.route('/customerfeedback/<int:feedbackid>', methods=['DELETE'])
 def delete_customerfeedback(feedbackid):
     feedback = CustomerFeedback.query.filter_by(feedbackid=feedbackid).first()
     if not feedback:
         return jsonify({'message': 'Customer Feedback not found'}), 404
     db.session.delete(feedback)
+    record_feedback(feedback, -1)
     db.session.commit()
     return jsonify({'message': 'Customer Feedback deleted successfully'})
 
-@app.route('/staff', methods=['GET', 'POST', 'PUT'])
+@bp.route('/staff', methods=['GET', 'POST', 'PUT'])
 def manage_staff():
     if request.method == 'GET':
-        staff = Staff.query.all()
-        return jsonify([member.to_dict() for member in staff])
+        return collection_response(Staff)
     if request.method == 'POST':
         data = request.get_json()
         staff = Staff(
@@ -727,7 +1107,7 @@ def manage_staff():
         db.session.commit()
         return jsonify({'message': 'Staff updated successfully'})
     
-@app.route('/staff/<int:staffid>', methods=['DELETE'])
+@bp.route('/staff/<int:staffid>', methods=['DELETE'])
 def delete_staff(staffid):
     staff = Staff.query.filter_by(staffid=staffid).first()
     if not staff:
@@ -736,11 +1116,10 @@ def delete_staff(staffid):
     db.session.commit()
     return jsonify({'message': 'Staff deleted successfully'})
 
-@app.route('/inventory', methods=['GET', 'POST', 'PUT'])
+@bp.route('/inventory', methods=['GET', 'POST', 'PUT'])
 def manage_inventory():
     if request.method == 'GET':
-        inventory = Inventory.query.all()
-        return jsonify([item.to_dict() for item in inventory])
+        return collection_response(Inventory)
     if request.method == 'POST':
         data = request.get_json()
         item = Inventory(
@@ -755,30 +1134,36 @@ def manage_inventory():
         return jsonify({'message': 'Inventory item added successfully'}), 201
     if request.method == 'PUT':
         data = request.get_json()
-        item = Inventory.query.filter_by(inventoryid=data['inventoryid']).first()
-        if not item:
-            return jsonify({'message': 'Inventory item not found'}), 404
-        item.bookid = data['bookid']
-        item.quantity = data['quantity']
-        item.supplierid = data['supplierid']
-        item.storeid = data['storeid']
-        db.session.commit()
-        return jsonify({'message': 'Inventory item updated successfully'})
+        if 'delta' in data:
+            if not isinstance(data['delta'], int) or isinstance(data['delta'], bool):
+                return jsonify({'message': 'delta must be an integer'}), 400
+            # Relative stock adjustment: quantity = quantity + delta, never below zero
+            if increment(Inventory, data['inventoryid'], 'quantity', data['delta'], minimum=0):
+                db.session.commit()
+                return jsonify({'message': 'Inventory item updated successfully'})
+            db.session.rollback()
+            if not Inventory.query.filter_by(inventoryid=data['inventoryid']).first():
+                return jsonify({'message': 'Inventory item not found'}), 404
+            return jsonify({'message': 'Insufficient stock'}), 409
+        values = {
+            'bookid': data['bookid'],
+            'quantity': data['quantity'],
+            'supplierid': data['supplierid'],
+            'storeid': data['storeid']
+        }
+        return versioned_update(Inventory, data['inventoryid'], values, 'Inventory item not found', 'Inventory item updated successfully')
 
-@app.route('/inventory/<int:inventoryid>', methods=['DELETE'])
+@bp.route('/inventory/<int:inventoryid>', methods=['DELETE'])
 def delete_inventory(inventoryid):
     item = Inventory.query.filter_by(inventoryid=inventoryid).first()
     if not item:
         return jsonify({'message': 'Inventory item not found'}), 404
-    db.session.delete(item)
-    db.session.commit()
-    return jsonify({'message': 'Inventory item deleted successfully'})
+    return versioned_delete(item, 'Inventory item deleted successfully')
 
-@app.route('/contracts', methods=['GET', 'POST', 'PUT'])
+@bp.route('/contracts', methods=['GET', 'POST', 'PUT'])
 def manage_contracts():
     if request.method == 'GET':
-        contracts = Contracts.query.all()
-        return jsonify([contract.to_dict() for contract in contracts])
+        return collection_response(Contracts)
     if request.method == 'POST':
         data = request.get_json()
         contract = Contracts(
@@ -805,7 +1190,7 @@ def manage_contracts():
         db.session.commit()
         return jsonify({'message': 'Contract updated successfully'})
 
-@app.route('/contracts/<int:contractid>', methods=['DELETE'])
+@bp.route('/contracts/<int:contractid>', methods=['DELETE'])
 def delete_contract(contractid):
     contract = Contracts.query.filter_by(contractid=contractid).first()
     if not contract:
@@ -814,11 +1199,40 @@ def delete_contract(contractid):
     db.session.commit()
     return jsonify({'message': 'Contract deleted successfully'})
 
-@app.route('/wishlist', methods=['GET', 'POST', 'PUT'])
+# Suppliers with an active contract, e.g. /contracts/active?idpublisher=P1&date=2024-05-01
+@bp.route('/contracts/active', methods=['GET'])
+def get_active_contracts():
+    idpublisher = request.args.get('idpublisher')
+    try:
+        day = as_date(request.args.get('date') or date.today())
+    except ValueError:
+        return jsonify({'message': 'date must be YYYY-MM-DD'}), 400
+    if not idpublisher:
+        return jsonify({'message': 'idpublisher is required'}), 400
+    return jsonify([contract.to_dict() for contract in active_contracts(idpublisher, day)])
+
+# Batched probes for routing jobs:
+# {"probes": [{"idpublisher": "P1", "date": "2024-05-01"}, ...]} -> supplier ids per probe
+@bp.route('/contracts/active', methods=['POST'])
+def batch_active_contracts():
+    probes = request.get_json().get('probes', [])
+    if len(probes) > current_app.config['CONTRACT_MAX_PROBES']:
+        return jsonify({'message': f"At most {current_app.config['CONTRACT_MAX_PROBES']} probes per call"}), 400
+    try:
+        parsed = [(probe['idpublisher'], as_date(probe['date'])) for probe in probes]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'message': 'Each probe needs idpublisher and a YYYY-MM-DD date'}), 400
+    trees = contract_index.refresh(current_app.config['CONTRACT_REFRESH_INTERVAL'])
+    results = [
+        {'idpublisher': idpublisher, 'date': day.isoformat(), 'suppliers': contract_index.active_suppliers(trees, idpublisher, day)}
+        for idpublisher, day in parsed
+    ]
+    return jsonify({'results': results})
+
+@bp.route('/wishlist', methods=['GET', 'POST', 'PUT'])
 def manage_wishlist():
     if request.method == 'GET':
-        wishlist = Wishlist.query.all()
-        return jsonify([item.to_dict() for item in wishlist])
+        return collection_response(Wishlist)
     if request.method == 'POST':
         data = request.get_json()
         wishlist = Wishlist(
@@ -832,29 +1246,24 @@ def manage_wishlist():
         return jsonify({'message': 'Wishlist item added successfully'}), 201
     if request.method == 'PUT':
         data = request.get_json()
-        wishlist = Wishlist.query.filter_by(wishlistitemid=data['wishlistitemid']).first()
-        if not wishlist:
-            return jsonify({'message': 'Wishlist item not found'}), 404
-        wishlist.customernumber = data['customernumber']
-        wishlist.totalprice = data['totalprice']
-        wishlist.wishlistquantity = data['wishlistquantity']
-        db.session.commit()
-        return jsonify({'message': 'Wishlist item updated successfully'})
+        values = {
+            'customernumber': data['customernumber'],
+            'totalprice': data['totalprice'],
+            'wishlistquantity': data['wishlistquantity']
+        }
+        return versioned_update(Wishlist, data['wishlistitemid'], values, 'Wishlist item not found', 'Wishlist item updated successfully')
 
-@app.route('/wishlist/<int:wishlistitemid>', methods=['DELETE'])
+@bp.route('/wishlist/<int:wishlistitemid>', methods=['DELETE'])
 def delete_wishlist(wishlistitemid):
     wishlist = Wishlist.query.filter_by(wishlistitemid=wishlistitemid).first()
     if not wishlist:
         return jsonify({'message': 'Wishlist item not found'}), 404
-    db.session.delete(wishlist)
-    db.session.commit()
-    return jsonify({'message': 'Wishlist item deleted successfully'})
+    return versioned_delete(wishlist, 'Wishlist item deleted successfully')
 
-@app.route('/wishlistitems', methods=['GET', 'POST', 'PUT'])
+@bp.route('/wishlistitems', methods=['GET', 'POST', 'PUT'])
 def manage_wishlistitems():
     if request.method == 'GET':
-        wishlistitems = WishlistItems.query.all()
-        return jsonify([item.to_dict() for item in wishlistitems])
+        return collection_response(WishlistItems)
     if request.method == 'POST':
         data = request.get_json()
         wishlistitem = WishlistItems(
@@ -875,7 +1284,7 @@ def manage_wishlistitems():
         db.session.commit()
         return jsonify({'message': 'Wishlist Item updated successfully'})
 
-@app.route('/wishlistitems/<int:wishlistitemid>/<string:isbn>', methods=['DELETE'])
+@bp.route('/wishlistitems/<int:wishlistitemid>/<string:isbn>', methods=['DELETE'])
 def delete_wishlistitem(wishlistitemid, isbn):
     wishlistitem = WishlistItems.query.filter_by(wishlistitemid=wishlistitemid, isbn=isbn).first()
     if not wishlistitem:
@@ -885,6 +1294,4 @@ def delete_wishlistitem(wishlistitemid, isbn):
     return jsonify({'message': 'Wishlist Item deleted successfully'})
 
 if __name__ == '__main__':
-    with app.app_context():
-        init_db()
-    app.run(debug=True)
+    create_app(DevelopmentConfig).run()
@@ -0,0 +1,136 @@
+import base64
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+# Passwords are stored as scrypt$<n>$<r>$<p>$<salt>$<hash>. Rows written before
+# hashing was introduced hold plaintext and are re-hashed on their next login.
+# Hashing is memory-hard and CPU-bound, so it runs in a small process pool
+# instead of on the request thread, and the pool refuses work past its bound.
+
+PREFIX = 'scrypt'
+
+class PoolBusy(Exception):
+    pass
+
+def b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+def hash_password(password, n, r, p):
+    salt = os.urandom(16)
+    digest = hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p)
+    return f'{PREFIX}${n}${r}${p}${b64(salt)}${b64(digest)}'
+
+# Returns (matches, needs_rehash)
+def verify_password(stored, password, n, r, p):
+    if not stored.startswith(PREFIX + '$'):
+        matches = hmac.compare_digest(stored.encode('utf-8'), password.encode('utf-8'))
+        return matches, matches
+    _, sn, sr, sp, salt, digest = stored.split('$')
+    sn, sr, sp = int(sn), int(sr), int(sp)
+    candidate = hashlib.scrypt(
+        password.encode('utf-8'), salt=base64.b64decode(salt), n=sn, r=sr, p=sp, maxmem=256 * sn * sr * sp
+    )
+    matches = hmac.compare_digest(candidate, base64.b64decode(digest))
+    return matches, matches and (sn, sr, sp) != (n, r, p)
+
+class HashPool:
+    def __init__(self):
+        self.executor = None
+        self.pid = None
+        self.slots = None
+        self.lock = threading.Lock()
+
+    # Created lazily in each process so pre-forked workers get their own pool
+    def get(self):
+        if self.executor is None or self.pid != os.getpid():
+            with self.lock:
+                if self.executor is None or self.pid != os.getpid():
+                    config = current_app.config
+                    self.executor = ProcessPoolExecutor(
+                        max_workers=config['AUTH_POOL_WORKERS'], mp_context=multiprocessing.get_context('spawn')
+                    )
+                    self.slots = threading.BoundedSemaphore(config['AUTH_POOL_WORKERS'] + config['AUTH_POOL_QUEUE'])
+                    self.pid = os.getpid()
+        return self.executor
+
+    # A worker process that dies (OOM kill, segfault) breaks the whole
+    # executor; it is dropped so the next call builds a new one
+    def discard(self, executor):
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # A slot is held until the job itself finishes, not until the caller gives
+    # up on it, so jobs abandoned on timeout still count against the bound
+    def run(self, func, *args):
+        executor = self.get()
+        slots = self.slots
+        if not slots.acquire(blocking=False):
+            raise PoolBusy('Too many concurrent password operations')
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            slots.release()
+            self.discard(executor)
+            raise PoolBusy('Password worker pool failed')
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=current_app.config['AUTH_POOL_TIMEOUT'])
+        except TimeoutError:
+            # Drops the job if no worker has picked it up yet
+            future.cancel()
+            raise PoolBusy('Password operation timed out')
+        except BrokenProcessPool:
+            self.discard(executor)
+            raise PoolBusy('Password worker pool failed')
+
+pool = HashPool()
+
+def scrypt_params():
+    config = current_app.config
+    return config['PASSWORD_SCRYPT_N'], config['PASSWORD_SCRYPT_R'], config['PASSWORD_SCRYPT_P']
+
+def hash_in_pool(password):
+    return pool.run(hash_password, password, *scrypt_params())
+
+# Verifies against a throwaway hash when the account does not exist so that
+# unknown usernames take as long as wrong passwords
+def check_in_pool(stored, password):
+    if stored is None:
+        pool.run(verify_password, dummy_hash(), password, *scrypt_params())
+        return False, False
+    return pool.run(verify_password, stored, password, *scrypt_params())
+
+_dummy = {}
+
+def dummy_hash():
+    params = scrypt_params()
+    if params not in _dummy:
+        _dummy[params] = pool.run(hash_password, secrets.token_hex(16), *params)
+    return _dummy[params]
+
+def serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='session')
+
+def issue_token(claims):
+    return serializer().dumps(claims)
+
+# Session claims from the Authorization: Bearer header, or None. Only the
+# signature and age are checked; there is no database lookup.
+def current_session():
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        return serializer().loads(header[7:], max_age=current_app.config['SESSION_MAX_AGE'])
+    except (BadSignature, SignatureExpired):
+        return None
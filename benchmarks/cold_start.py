@@ -0,0 +1,40 @@
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Measures cold start in fresh interpreters: importing the app module,
+# building it with create_app(), and serving the first request.
+#   python -m benchmarks.cold_start --runs 10
+
+# The probe signs no tokens, so any SECRET_KEY satisfies create_app()
+PROBE = '''
+import os
+import time
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+application.test_client().get('/')
+served = time.perf_counter()
+print(imported - started, created - started, served - started)
+'''
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True, check=True).stdout
+        samples.append([float(value) for value in output.split()])
+
+    for index, name in enumerate(('import', 'create_app', 'first request')):
+        values = [sample[index] * 1000 for sample in samples]
+        print(f'{name:>14}: median {statistics.median(values):.1f} ms, max {max(values):.1f} ms')
+
+if __name__ == '__main__':
+    main()
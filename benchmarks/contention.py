@@ -0,0 +1,72 @@
+import argparse
+import json
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# Hammers one inventory row and one book row with concurrent writers against a
+# running server, then checks that no stock adjustment was lost.
+#   python benchmarks/contention.py --inventoryid 1 --isbn 978-0 --writers 64
+
+def call(base, method, path, body=None, headers=None):
+    request = urllib.request.Request(
+        base + path,
+        data=json.dumps(body).encode() if body is not None else None,
+        headers={'Content-Type': 'application/json', **(headers or {})},
+        method=method,
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read() or b'null')
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+def find(rows, key, value):
+    return next(row for row in rows if str(row[key]) == str(value))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base', default='http://127.0.0.1:5000')
+    parser.add_argument('--inventoryid', type=int, required=True)
+    parser.add_argument('--isbn', required=True)
+    parser.add_argument('--writers', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    _, inventory = call(args.base, 'GET', '/inventory')
+    before = find(inventory, 'inventoryid', args.inventoryid)['quantity']
+
+    def stock_writer(n):
+        statuses = Counter()
+        for i in range(args.requests):
+            status, _ = call(args.base, 'PUT', '/inventory', {'inventoryid': args.inventoryid, 'delta': 1})
+            statuses[status] += 1
+        return statuses
+
+    def price_writer(n):
+        statuses = Counter()
+        for i in range(args.requests):
+            price = round(10 + (n * args.requests + i) % 100 / 10, 2)
+            status, _ = call(args.base, 'PUT', f'/books/update/{args.isbn}', {'price': price})
+            statuses[status] += 1
+        return statuses
+
+    results = {}
+    for name, writer in (('inventory delta', stock_writer), ('book price CAS', price_writer)):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.writers) as pool:
+            statuses = sum(pool.map(writer, range(args.writers)), Counter())
+        elapsed = time.perf_counter() - started
+        results[name] = statuses
+        total = args.writers * args.requests
+        print(f'{name}: {total} writes in {elapsed:.2f}s ({total / elapsed:.0f}/s) statuses={dict(statuses)}')
+
+    _, inventory = call(args.base, 'GET', '/inventory')
+    after = find(inventory, 'inventoryid', args.inventoryid)['quantity']
+    expected = before + results['inventory delta'][200]
+    print(f'inventory quantity {before} -> {after} (expected {expected}, lost {expected - after})')
+
+if __name__ == '__main__':
+    main()
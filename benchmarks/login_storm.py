@@ -0,0 +1,78 @@
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# Measures catalog GET latency on a running server, first idle and then while
+# many threads log in concurrently. Password hashing runs in a process pool,
+# so the two latency profiles should be close.
+#   python -m benchmarks.login_storm --username alice --password secret
+
+def timed_get(url):
+    started = time.perf_counter()
+    with urllib.request.urlopen(url) as response:
+        response.read()
+    return (time.perf_counter() - started) * 1000
+
+def login(base, username, password):
+    request = urllib.request.Request(
+        base + '/login',
+        data=json.dumps({'username': username, 'password': password}).encode(),
+        headers={'Content-Type': 'application/json'},
+        method='POST',
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return f'p50 {statistics.median(ordered):.1f} ms, p95 {pick(0.95):.1f} ms, p99 {pick(0.99):.1f} ms'
+
+def sample(url, count):
+    return [timed_get(url) for _ in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base', default='http://127.0.0.1:5000')
+    parser.add_argument('--path', default='/books/filter?per_page=50')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--logins', type=int, default=64, help='concurrent login threads')
+    parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+    url = args.base + args.path
+
+    print('idle:        ', percentiles(sample(url, args.samples)))
+
+    stop = threading.Event()
+    statuses = {}
+    lock = threading.Lock()
+
+    def storm():
+        while not stop.is_set():
+            status = login(args.base, args.username, args.password)
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=storm, daemon=True) for _ in range(args.logins)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    busy = sample(url, args.samples)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print('login storm: ', percentiles(busy))
+    print(f'logins: {sum(statuses.values()) / elapsed:.0f}/s statuses={statuses}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import sys
+from sqlalchemy import text
+from app import create_app
+from config import Config
+from models import db
+
+# Runs EXPLAIN for the lookups we rely on and fails if any of them stops
+# using an index. Sequential scans are disabled on Postgres so the check does
+# not depend on how much data the target database happens to hold.
+#   python -m benchmarks.query_plans
+
+ACCESS_PATHS = [
+    ('inventory by book+store', 'inventory', "SELECT quantity FROM inventory WHERE bookid = 'x' AND storeid = 1"),
+    ('inventory by store', 'inventory', 'SELECT * FROM inventory WHERE storeid = 1'),
+    ('inventory by supplier', 'inventory', 'SELECT * FROM inventory WHERE supplierid = 1'),
+    ('reviews by isbn+date', 'bookreviews', "SELECT * FROM bookreviews WHERE isbn = 'x' ORDER BY reviewdate DESC"),
+    ('reviews by customer', 'bookreviews', 'SELECT * FROM bookreviews WHERE customernumber = 1'),
+    ('accounts by customer', 'onlineaccount', 'SELECT * FROM onlineaccount WHERE customernumber = 1'),
+    ('staff by store', 'staff', 'SELECT * FROM staff WHERE storeid = 1'),
+    ('supplies by store', 'ordersupplies', 'SELECT * FROM ordersupplies WHERE storeid = 1'),
+    ('supplies by supplier', 'ordersupplies', 'SELECT * FROM ordersupplies WHERE supplierid = 1'),
+    ('contracts by supplier', 'contracts', 'SELECT * FROM contracts WHERE supplierid = 1'),
+    ('contracts by publisher', 'contracts', "SELECT * FROM contracts WHERE idpublisher = 'x'"),
+    ('wishlist items by isbn', 'wishlistitems', "SELECT * FROM wishlistitems WHERE isbn = 'x'"),
+    ('books by publisher', 'book', "SELECT * FROM book WHERE idpublisher = 'x'"),
+]
+
+# Only reads plans, so any SECRET_KEY satisfies create_app()
+class BenchmarkConfig(Config):
+    SECRET_KEY = Config.SECRET_KEY or 'benchmark'
+
+def plan(conn, sql):
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text('SET LOCAL enable_seqscan = off'))
+        return '\n'.join(row[0] for row in conn.execute(text('EXPLAIN ' + sql)))
+    return '\n'.join(str(row[-1]) for row in conn.execute(text('EXPLAIN QUERY PLAN ' + sql)))
+
+def uses_index(dialect, table, explained):
+    if dialect == 'postgresql':
+        return f'Seq Scan on {table}' not in explained
+    return f'SCAN {table}' not in explained.replace('TABLE ', '')
+
+def main():
+    failures = 0
+    app = create_app(BenchmarkConfig)
+    with app.app_context(), db.engine.connect() as conn:
+        for name, table, sql in ACCESS_PATHS:
+            with conn.begin():
+                explained = plan(conn, sql)
+            ok = uses_index(conn.dialect.name, table, explained)
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name}")
+            if not ok:
+                print('     ' + explained.replace('\n', '\n     '))
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
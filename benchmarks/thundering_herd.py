@@ -0,0 +1,56 @@
+import argparse
+import json
+import threading
+import time
+import urllib.request
+
+# Fires waves of identical concurrent GETs at a running server and reports how
+# many database executions served them, from the server's /coalescing
+# counters. Run against a single worker to see one worker's coalescing ratio.
+#   python -m benchmarks.thundering_herd --path '/books/search?keywords=dune'
+
+def get(url):
+    with urllib.request.urlopen(url) as response:
+        return response.read()
+
+def counters(base, endpoint):
+    stats = json.loads(get(base + '/coalescing')).get(endpoint, {})
+    return {name: stats.get(name, 0) for name in ('leaders', 'followers', 'fallbacks')}
+
+def wave(url, clients):
+    barrier = threading.Barrier(clients)
+    def client():
+        barrier.wait()
+        get(url)
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--base', default='http://127.0.0.1:5000')
+    parser.add_argument('--path', default='/books/search?keywords=dune')
+    parser.add_argument('--endpoint', default='api.search_books')
+    parser.add_argument('--clients', type=int, default=200, help='concurrent identical requests per wave')
+    parser.add_argument('--waves', type=int, default=20)
+    args = parser.parse_args()
+    url = args.base + args.path
+
+    before = counters(args.base, args.endpoint)
+    started = time.perf_counter()
+    for _ in range(args.waves):
+        wave(url, args.clients)
+    elapsed = time.perf_counter() - started
+    after = counters(args.base, args.endpoint)
+
+    delta = {name: after[name] - before[name] for name in after}
+    requests = args.clients * args.waves
+    executions = delta['leaders'] + delta['fallbacks']
+    print(f'requests:   {requests} in {elapsed:.2f} s ({requests / elapsed:.0f}/s)')
+    print(f'executions: {executions} ({executions / elapsed:.1f} queries/s, {requests / elapsed:.0f}/s without coalescing)')
+    print(f'coalescing ratio: {requests / max(executions, 1):.1f} requests per execution {delta}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+from sqlalchemy import and_, func, select
+from models import db
+
+OPERATORS = {
+    'eq': lambda column, value: column == value,
+    'ne': lambda column, value: column != value,
+    'lt': lambda column, value: column < value,
+    'lte': lambda column, value: column <= value,
+    'gt': lambda column, value: column > value,
+    'gte': lambda column, value: column >= value,
+    'in': lambda column, value: column.in_(value),
+}
+
+SCALARS = (str, int, float, bool)
+
+def check_operand(name, op, operand):
+    if op == 'in':
+        if not isinstance(operand, list) or not all(isinstance(item, SCALARS) for item in operand):
+            raise ValueError(f'{name}: "in" requires a list of values')
+    elif not isinstance(operand, SCALARS) and not (operand is None and op in ('eq', 'ne')):
+        raise ValueError(f'{name}: "{op}" requires a single value')
+
+# {"idpublisher": "P1", "publicationyear": {"lt": 2000}} -> SQL condition
+def build_filter(table, spec):
+    if not spec or not isinstance(spec, dict):
+        raise ValueError('A non-empty filter is required')
+    conditions = []
+    for name, value in spec.items():
+        if name not in table.c:
+            raise ValueError(f'Unknown column: {name}')
+        column = table.c[name]
+        if not isinstance(value, dict):
+            value = {'eq': value}
+        if not value:
+            raise ValueError(f'{name}: an operator is required')
+        for op, operand in value.items():
+            if op not in OPERATORS:
+                raise ValueError(f'Unknown operator: {op}')
+            check_operand(name, op, operand)
+            conditions.append(OPERATORS[op](column, operand))
+    return and_(*conditions)
+
+def referencing(table):
+    for other in db.metadata.sorted_tables:
+        for fk in other.foreign_keys:
+            if fk.column.table is table and other is not table:
+                yield other, fk.parent, fk.column
+
+# (table, condition) pairs with dependents ahead of the rows they reference
+def delete_plan(table, condition):
+    steps = []
+    for child, column, referenced in referencing(table):
+        steps += delete_plan(child, column.in_(select(referenced).where(condition)))
+    steps.append((table, condition))
+    return steps
+
+# Set-based delete of the matching rows and everything that references them,
+# in one transaction. Returns affected row counts per table. before_delete is
+# called with (table, condition) ahead of each DELETE, in the same transaction.
+def bulk_delete(model, spec, dry_run=False, before_delete=None):
+    table = model.__table__
+    counts = {}
+    try:
+        for step_table, condition in delete_plan(table, build_filter(table, spec)):
+            if dry_run:
+                affected = db.session.execute(
+                    select(func.count()).select_from(step_table).where(condition)
+                ).scalar()
+            else:
+                if before_delete is not None:
+                    before_delete(step_table, condition)
+                affected = db.session.execute(step_table.delete().where(condition)).rowcount
+            counts[step_table.name] = counts.get(step_table.name, 0) + affected
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return counts
@@ -0,0 +1,46 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Thread-safe LRU cache holding entries up to a total weight of `size`: by
+# default every entry weighs 1, so `size` is an entry count; pass weigh=len to
+# bound the cache by the bytes of its values. With a ttl, entries also expire
+# that many seconds after they were put.
+class LRUCache:
+    def __init__(self, size, ttl=None, weigh=None):
+        self.size = size
+        self.ttl = ttl
+        self.weigh = weigh or (lambda value: 1)
+        self.weight = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value, _ = entry
+            if expires is not None and expires < time.monotonic():
+                self.discard(key)
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        weight = self.weigh(value)
+        with self.lock:
+            self.discard(key)
+            # A value heavier than the whole cache would only evict everything else
+            if weight > self.size:
+                return
+            self.entries[key] = (None if self.ttl is None else time.monotonic() + self.ttl, value, weight)
+            self.weight += weight
+            while self.weight > self.size:
+                self.discard(next(iter(self.entries)))
+
+    # Callers hold the lock
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[2]
@@ -0,0 +1,122 @@
+import numpy as np
+from sqlalchemy import select
+from models import db, Book, BookBookGenre
+from outbox import OutboxFollower
+
+# In-memory, column-oriented copy of the book catalog. Each worker holds one;
+# range and set filters are evaluated as vectorized masks without a query.
+# refresh() reloads only the ISBNs whose book or genre-link rows appear in the
+# outbox since the snapshot was taken.
+
+class Snapshot:
+    def __init__(self, isbn, price, year, pages, publisher, genres, publisher_codes, genre_codes):
+        self.isbn = isbn
+        self.price = price
+        self.year = year
+        self.pages = pages
+        self.publisher = publisher
+        self.genres = genres
+        self.publisher_codes = publisher_codes
+        self.genre_codes = genre_codes
+        self.position = {value: index for index, value in enumerate(isbn)}
+
+    def __len__(self):
+        return len(self.isbn)
+
+def empty_snapshot():
+    return Snapshot(
+        np.array([], dtype=object), np.array([], dtype=np.float64),
+        np.array([], dtype=np.int32), np.array([], dtype=np.int32),
+        np.array([], dtype=np.int32), np.zeros((0, 0), dtype=bool), {}, {},
+    )
+
+def load_rows(isbns=None):
+    book = Book.__table__
+    link = BookBookGenre.__table__
+    books = select(book.c.isbn, book.c.price, book.c.publicationyear, book.c.pages, book.c.idpublisher)
+    genres = select(link.c.isbn, link.c.genreid)
+    if isbns is not None:
+        books = books.where(book.c.isbn.in_(isbns))
+        genres = genres.where(link.c.isbn.in_(isbns))
+    rows = db.session.execute(books).all()
+    genre_rows = db.session.execute(genres).all()
+    return rows, genre_rows
+
+# Builds a snapshot from kept rows of a previous one plus freshly loaded rows
+def build(base, keep, rows, genre_rows):
+    publisher_codes = dict(base.publisher_codes)
+    genre_codes = dict(base.genre_codes)
+    for row in rows:
+        publisher_codes.setdefault(row.idpublisher, len(publisher_codes))
+    for row in genre_rows:
+        genre_codes.setdefault(row.genreid, len(genre_codes))
+
+    count = len(rows)
+    isbn = np.array([row.isbn for row in rows], dtype=object)
+    price = np.fromiter((row.price for row in rows), dtype=np.float64, count=count)
+    year = np.fromiter((row.publicationyear for row in rows), dtype=np.int32, count=count)
+    pages = np.fromiter((row.pages for row in rows), dtype=np.int32, count=count)
+    publisher = np.fromiter((publisher_codes[row.idpublisher] for row in rows), dtype=np.int32, count=count)
+    genres = np.zeros((count, len(genre_codes)), dtype=bool)
+    position = {value: index for index, value in enumerate(isbn)}
+    for row in genre_rows:
+        if row.isbn in position:
+            genres[position[row.isbn], genre_codes[row.genreid]] = True
+
+    kept_genres = np.zeros((int(keep.sum()), len(genre_codes)), dtype=bool)
+    kept_genres[:, :base.genres.shape[1]] = base.genres[keep]
+    return Snapshot(
+        np.concatenate([base.isbn[keep], isbn]),
+        np.concatenate([base.price[keep], price]),
+        np.concatenate([base.year[keep], year]),
+        np.concatenate([base.pages[keep], pages]),
+        np.concatenate([base.publisher[keep], publisher]),
+        np.concatenate([kept_genres, genres]),
+        publisher_codes, genre_codes,
+    )
+
+class Catalog(OutboxFollower):
+    tables = ('book', 'bookbookgenre')
+
+    def keys(self, change):
+        return {change['data']['isbn']}
+
+    def build_state(self):
+        rows, genre_rows = load_rows()
+        return build(empty_snapshot(), np.zeros(0, dtype=bool), rows, genre_rows)
+
+    def apply(self, current, isbns):
+        rows, genre_rows = load_rows(sorted(isbns))
+        keep = np.ones(len(current), dtype=bool)
+        for isbn in isbns:
+            if isbn in current.position:
+                keep[current.position[isbn]] = False
+        return build(current, keep, rows, genre_rows)
+
+catalog = Catalog()
+
+SORT_COLUMNS = ('price', 'year', 'pages', 'isbn')
+
+# Evaluates range/set predicates as boolean masks and returns a sorted page of ISBNs
+def filter_books(snapshot, ranges, publishers=None, genres=None, sort='isbn', descending=False, page=1, per_page=50):
+    mask = np.ones(len(snapshot), dtype=bool)
+    for name, (low, high) in ranges.items():
+        column = getattr(snapshot, name)
+        if low is not None:
+            mask &= column >= low
+        if high is not None:
+            mask &= column <= high
+    if publishers:
+        codes = [snapshot.publisher_codes[p] for p in publishers if p in snapshot.publisher_codes]
+        mask &= np.isin(snapshot.publisher, codes)
+    if genres:
+        codes = [snapshot.genre_codes[g] for g in genres if g in snapshot.genre_codes]
+        mask &= snapshot.genres[:, codes].any(axis=1) if codes else False
+
+    matched = np.flatnonzero(mask)
+    keys = getattr(snapshot, sort)[matched]
+    order = matched[np.argsort(keys, kind='stable')]
+    if descending:
+        order = order[::-1]
+    start = (page - 1) * per_page
+    return int(len(matched)), snapshot.isbn[order[start:start + per_page]].tolist()
@@ -0,0 +1,99 @@
+import threading
+from collections import defaultdict
+from functools import wraps
+from flask import current_app, make_response, request
+from sqlalchemy import func, select
+from models import db, Outbox
+
+# Single-flight coalescing: concurrent requests for the same view, arguments
+# and table versions share one execution. The first request (the leader) runs
+# the view; the others wait for it and are answered from its status, headers
+# and serialized body. Nothing is kept once the leader finishes, so this is
+# not a cache: a request never sees a result computed before it arrived
+# except through the table versions in its key, which are the latest outbox
+# sequence numbers of the tables the view reads.
+
+class Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    def __init__(self):
+        self.flights = {}
+        self.counters = defaultdict(lambda: {'leaders': 0, 'followers': 0, 'fallbacks': 0})
+        self.lock = threading.Lock()
+
+    def do(self, name, key, fn, timeout):
+        with self.lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = Flight()
+            self.counters[name]['leaders' if leader else 'followers'] += 1
+        if not leader:
+            if flight.done.wait(timeout):
+                if flight.error is not None:
+                    raise flight.error
+                return flight.result
+            # The leader is taking too long; run independently rather than
+            # tie this request's latency to it
+            with self.lock:
+                self.counters[name]['fallbacks'] += 1
+            return fn()
+        try:
+            flight.result = fn()
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.flights[key]
+            flight.done.set()
+
+    # Requests served per view execution; 1.0 means nothing was coalesced
+    def stats(self):
+        with self.lock:
+            stats = {}
+            for name, counters in self.counters.items():
+                executions = counters['leaders'] + counters['fallbacks']
+                served = counters['leaders'] + counters['followers']
+                stats[name] = {**counters, 'ratio': round(served / executions, 2) if executions else None}
+            return stats
+
+flights = SingleFlight()
+
+# One round trip: the latest outbox sequence number of each table. Read on a
+# connection of its own that goes back to the pool at once, so followers hold
+# no connection while they wait and only the leader uses one.
+def table_versions(tables):
+    outbox = Outbox.__table__
+    stmt = select(*(
+        select(func.max(outbox.c.seq)).where(outbox.c.tablename == table).scalar_subquery()
+        for table in tables
+    ))
+    with db.engine.connect() as conn:
+        return tuple(conn.execute(stmt).one())
+
+def freeze(rv):
+    response = make_response(rv)
+    return response.status_code, list(response.headers.items()), response.get_data()
+
+def coalesced(*tables):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            key = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                table_versions(tables),
+            )
+            status, headers, body = flights.do(
+                request.endpoint, key, lambda: freeze(view(**kwargs)), current_app.config['COALESCE_WAIT_TIMEOUT']
+            )
+            return current_app.response_class(body, status=status, headers=headers)
+        return wrapper
+    return decorator
@@ -0,0 +1,117 @@
+import zlib
+from collections import OrderedDict
+from flask import request
+from cache import LRUCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE = (
+    'application/json', 'text/html', 'text/plain', 'text/csv',
+    'application/msgpack', 'application/vnd.apache.arrow.stream',
+)
+
+# Incremental compressors: each returns (compress(chunk), flush()) callables
+def gzip_compressor(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress, compressor.flush
+
+def brotli_compressor(level):
+    compressor = brotli.Compressor(quality=level)
+    return compressor.process, compressor.finish
+
+def zstd_compressor(level):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return compressor.compress, compressor.flush
+
+ENCODERS = OrderedDict()
+if zstandard is not None:
+    ENCODERS['zstd'] = zstd_compressor
+if brotli is not None:
+    ENCODERS['br'] = brotli_compressor
+ENCODERS['gzip'] = gzip_compressor
+
+# Picks the best encoding we support that the client accepts (q > 0),
+# preferring the client's q-values and then our own order on ties.
+def negotiate(accept_encoding):
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for name in ENCODERS:
+        quality = accepted.get(name, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+def compress_stream(chunks, encoding, level):
+    compress, flush = ENCODERS[encoding](level)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compress(chunk)
+        if data:
+            yield data
+    yield flush()
+
+def init_compression(app):
+    min_size = app.config['COMPRESS_MIN_SIZE']
+    levels = app.config['COMPRESS_LEVELS']
+    # Compressed bodies keyed by (ETag, encoding) so unchanged payloads are
+    # compressed once no matter how often they are polled. Bounded by the
+    # total size of the bodies, since one entry can be megabytes.
+    cache = LRUCache(app.config['COMPRESS_CACHE_BYTES'], weigh=len)
+
+    @app.after_request
+    def compress_response(response):
+        if response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return response
+        if response.mimetype not in COMPRESSIBLE:
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request.headers.get('Accept-Encoding', ''))
+
+        if response.is_streamed:
+            if encoding is None:
+                return response
+            response.response = compress_stream(response.response, encoding, levels[encoding])
+            response.headers.pop('Content-Length', None)
+            response.headers['Content-Encoding'] = encoding
+            return response
+
+        if request.method == 'GET' and response.get_etag()[0] is None:
+            response.add_etag()
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+        if encoding is None or response.content_length < min_size:
+            return response
+
+        etag = response.get_etag()[0]
+        key = (request.full_path, etag, encoding)
+        body = cache.get(key) if etag else None
+        if body is None:
+            compress, flush = ENCODERS[encoding](levels[encoding])
+            body = compress(response.get_data()) + flush()
+            if etag:
+                cache.put(key, body)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            response.set_etag(etag, weak=True)
+        return response
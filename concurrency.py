@@ -0,0 +1,81 @@
+import random
+import time
+from flask import current_app
+from sqlalchemy import select, update
+from sqlalchemy.orm.exc import StaleDataError
+from models import db
+from outbox import record_row
+
+class ConflictError(Exception):
+    pass
+
+def primary_key(table):
+    return list(table.primary_key.columns)[0]
+
+# If-Match carries the row version as an entity tag: "3", W/"3" or *
+def parse_if_match(header):
+    if not header or header.strip() == '*':
+        return None
+    tag = header.split(',')[0].strip()
+    if tag.startswith('W/'):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        raise ValueError(f'Invalid If-Match header: {header}')
+
+# UPDATE ... SET version = version + 1 WHERE pk = :k AND version = :v
+# Returns the new version, or None when the row does not exist. A missed
+# update with an expected version is told apart by looking the row up.
+def compare_and_swap(model, pk, expected_version=None, **values):
+    table = model.__table__
+    pk_column = primary_key(table)
+    version = expected_version
+    if version is None:
+        version = db.session.execute(select(table.c.version).where(pk_column == pk)).scalar()
+        if version is None:
+            return None
+    result = db.session.execute(
+        update(table)
+        .where(pk_column == pk, table.c.version == version)
+        .values(version=table.c.version + 1, **values)
+    )
+    if result.rowcount != 1:
+        if expected_version is not None and db.session.execute(select(pk_column).where(pk_column == pk)).first() is None:
+            return None
+        raise ConflictError(f'{table.name} {pk} was modified concurrently')
+    record_row(table, pk)
+    return version + 1
+
+# UPDATE ... SET column = column + :delta, never reading the row first.
+# With a minimum, the update only applies if the result stays >= minimum.
+def increment(model, pk, column, delta, minimum=None):
+    table = model.__table__
+    target = table.c[column]
+    stmt = (
+        update(table)
+        .where(primary_key(table) == pk)
+        .values({column: target + delta, 'version': table.c.version + 1})
+    )
+    if minimum is not None:
+        stmt = stmt.where(target + delta >= minimum)
+    if db.session.execute(stmt).rowcount != 1:
+        return False
+    record_row(table, pk)
+    return True
+
+# Runs operation and commits, retrying with jittered backoff on version conflicts
+def run_with_retry(operation, attempts=None):
+    if attempts is None:
+        attempts = current_app.config['CONFLICT_RETRIES']
+    backoff = current_app.config['CONFLICT_BACKOFF']
+    for attempt in range(attempts):
+        try:
+            result = operation()
+            db.session.commit()
+            return result
+        except (ConflictError, StaleDataError) as e:
+            db.session.rollback()
+            if attempt == attempts - 1:
+                raise ConflictError(str(e))
+            time.sleep(backoff * (2 ** attempt) * random.random())
@@ -0,0 +1,100 @@
+from collections import defaultdict
+from sqlalchemy import Date, cast, func, literal_column, select
+from models import db, Contracts
+from outbox import OutboxFollower
+
+# Active-contract lookups: which suppliers hold a contract with publisher P on date D.
+# Single probes go to the database (a GiST index over daterange on Postgres);
+# batched probes use per-publisher interval trees held in each worker and
+# rebuilt only for publishers whose contracts appear in the outbox.
+
+def validity():
+    return func.daterange(Contracts.startdate, Contracts.enddate, literal_column("'[]'"))
+
+def active_contracts(idpublisher, day):
+    query = Contracts.query.filter(Contracts.idpublisher == idpublisher)
+    if db.engine.dialect.name == 'postgresql':
+        query = query.filter(validity().op('@>')(cast(day, Date)))
+    else:
+        query = query.filter(Contracts.startdate <= day, Contracts.enddate >= day)
+    return query.order_by(Contracts.supplierid).all()
+
+# Centered interval tree over closed [start, end] day ordinals
+class IntervalTree:
+    def __init__(self, intervals):
+        self.center = None
+        if not intervals:
+            return
+        points = sorted(point for start, end, _ in intervals for point in (start, end))
+        self.center = points[len(points) // 2]
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval[1] < self.center:
+                left.append(interval)
+            elif interval[0] > self.center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        self.by_start = sorted(here, key=lambda interval: interval[0])
+        self.by_end = sorted(here, key=lambda interval: interval[1], reverse=True)
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def stab(self, point):
+        node, found = self, []
+        while node is not None and node.center is not None:
+            if point < node.center:
+                for interval in node.by_start:
+                    if interval[0] > point:
+                        break
+                    found.append(interval[2])
+                node = node.left
+            elif point > node.center:
+                for interval in node.by_end:
+                    if interval[1] < point:
+                        break
+                    found.append(interval[2])
+                node = node.right
+            else:
+                found.extend(interval[2] for interval in node.by_start)
+                break
+        return found
+
+class ContractIndex(OutboxFollower):
+    tables = ('contracts',)
+
+    def __init__(self):
+        super().__init__()
+        # contractid -> idpublisher, so a contract moved to another publisher
+        # also rebuilds the tree it left
+        self.owners = {}
+
+    def keys(self, change):
+        return {change['data']['idpublisher'], self.owners.get(change['data']['contractid'])} - {None}
+
+    def build(self, publishers=None):
+        table = Contracts.__table__
+        stmt = select(table.c.contractid, table.c.idpublisher, table.c.startdate, table.c.enddate, table.c.supplierid)
+        if publishers is not None:
+            stmt = stmt.where(table.c.idpublisher.in_(publishers))
+            self.owners = {c: p for c, p in self.owners.items() if p not in publishers}
+        intervals = defaultdict(list)
+        for contractid, idpublisher, start, end, supplierid in db.session.execute(stmt):
+            self.owners[contractid] = idpublisher
+            intervals[idpublisher].append((start.toordinal(), end.toordinal(), supplierid))
+        return {idpublisher: IntervalTree(items) for idpublisher, items in intervals.items()}
+
+    def build_state(self):
+        self.owners = {}
+        return self.build()
+
+    def apply(self, trees, publishers):
+        trees = {p: tree for p, tree in trees.items() if p not in publishers}
+        trees.update(self.build(sorted(publishers)))
+        return trees
+
+    def active_suppliers(self, trees, idpublisher, day):
+        tree = trees.get(idpublisher)
+        return sorted(set(tree.stab(day.toordinal()))) if tree is not None else []
+
+contract_index = ContractIndex()
@@ -0,0 +1,180 @@
+import json
+import os
+import threading
+from collections import defaultdict, deque
+from models import db
+from outbox import changes_committed, read_changes, settled_seq
+
+# Live change push over Server-Sent Events. Clients subscribe to topics and
+# receive the outbox records for them as they commit:
+#
+#   store:<storeid>   inventory rows of a store
+#   isbn:<isbn>       the book row and its inventory rows
+#   prices            isbn and price of every book write
+#
+# Event ids are outbox sequence numbers, so a reconnecting client resumes from
+# Last-Event-ID by replaying the outbox. Each worker runs one relay thread that
+# tails the outbox (which every worker writes to) and hands records to an
+# in-process broker, which fans them out to the connections it holds. The
+# relay is the cross-worker transport; another one (e.g. Redis pub/sub) only
+# has to call broker.publish() with the same records.
+
+TABLES = ('inventory', 'book')
+
+def topics_for(change):
+    data = change['data']
+    if change['tablename'] == 'inventory':
+        return {f'store:{data["storeid"]}', f'isbn:{data["bookid"]}'}
+    return {f'isbn:{data["isbn"]}', 'prices'}
+
+# Subscribers that only follow prices get the price alone, everyone else the
+# whole outbox record
+def payload(change, topics):
+    if change['tablename'] == 'book' and topics_for(change) & topics == {'prices'}:
+        return {'isbn': change['data']['isbn'], 'price': change['data']['price'], 'op': change['op']}
+    return {'table': change['tablename'], 'op': change['op'], 'pk': change['pk'], 'data': change['data']}
+
+def format_event(seq, data, event=None):
+    lines = [f'id: {seq}']
+    if event:
+        lines.append(f'event: {event}')
+    lines.append('data: ' + json.dumps(data))
+    return '\n'.join(lines) + '\n\n'
+
+# A bounded per-connection queue. A client that falls `backlog` records behind
+# is disconnected with a resync event instead of buffering without limit.
+class Subscriber:
+    def __init__(self, topics, backlog):
+        self.topics = frozenset(topics)
+        self.events = deque()
+        self.backlog = backlog
+        self.overflowed = False
+        self.ready = threading.Event()
+
+    def put(self, change):
+        if len(self.events) >= self.backlog:
+            self.overflowed = True
+        else:
+            self.events.append(change)
+        self.ready.set()
+
+    def get(self, timeout):
+        if not self.events and not self.overflowed:
+            self.ready.wait(timeout)
+        self.ready.clear()
+        changes = []
+        while self.events:
+            changes.append(self.events.popleft())
+        return changes
+
+# Topic -> subscribers, so publishing costs one lookup per topic of the record
+# regardless of how many idle connections the worker holds
+class LocalBroker:
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, topics, backlog):
+        subscriber = Subscriber(topics, backlog)
+        with self.lock:
+            for topic in subscriber.topics:
+                self.subscribers[topic].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            for topic in subscriber.topics:
+                self.subscribers[topic].discard(subscriber)
+                if not self.subscribers[topic]:
+                    del self.subscribers[topic]
+
+    def publish(self, change, topics):
+        with self.lock:
+            targets = set()
+            for topic in topics:
+                targets.update(self.subscribers.get(topic, ()))
+        for subscriber in targets:
+            subscriber.put(change)
+
+class OutboxRelay:
+    def __init__(self, broker):
+        self.broker = broker
+        self.app = None
+        self.pid = None
+        self.seq = 0
+        self.caught_up = threading.Event()
+        self.lock = threading.Lock()
+
+    # Started lazily in each process so pre-forked workers get their own thread.
+    # It starts from the settled position, up to OUTBOX_MAX_TRANSACTION_AGE
+    # behind the head, and sets caught_up once a read comes back short.
+    def ensure_started(self, app):
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                self.app, self.seq, self.pid = app, settled_seq(app.config['OUTBOX_MAX_TRANSACTION_AGE']), os.getpid()
+                self.caught_up = threading.Event()
+                threading.Thread(target=self.run, name='events-relay', daemon=True).start()
+
+    def run(self):
+        config = self.app.config
+        while True:
+            try:
+                with self.app.app_context():
+                    changes = read_changes(self.seq, config['EVENTS_RELAY_BATCH'], config['OUTBOX_MAX_TRANSACTION_AGE'])
+                    db.session.remove()
+            except Exception:
+                self.app.logger.exception('Event relay failed to read the outbox')
+                changes = []
+            for change in changes:
+                self.seq = change['seq']
+                if change['tablename'] in TABLES:
+                    self.broker.publish(change, topics_for(change))
+            if len(changes) < config['EVENTS_RELAY_BATCH']:
+                self.caught_up.set()
+            if not changes:
+                with changes_committed:
+                    changes_committed.wait(config['CHANGES_POLL_INTERVAL'])
+
+broker = LocalBroker()
+relay = OutboxRelay(broker)
+
+# Outbox records for `topics` after `since`, for Last-Event-ID resume. Returns
+# (records, position read up to, complete); incomplete once `limit` records
+# have matched, in which case the client has to resync.
+def replay(since, topics, limit, max_age, batch):
+    replayed, seq = [], since
+    while len(replayed) < limit:
+        changes = read_changes(seq, batch, max_age)
+        if not changes:
+            return replayed, seq, True
+        for change in changes:
+            seq = change['seq']
+            if change['tablename'] in TABLES and topics_for(change) & topics:
+                replayed.append(change)
+    return replayed, seq, False
+
+# The subscriber is registered before the replay is read, so records the relay
+# publishes meanwhile are queued, and those the replay already covered are
+# skipped by sequence number
+def stream(subscriber, replayed, position, complete, heartbeat, retry):
+    yield f'retry: {int(retry * 1000)}\n\n'
+    for change in replayed:
+        yield format_event(change['seq'], payload(change, subscriber.topics))
+    if not complete:
+        yield format_event(position, {'reason': 'replay limit exceeded'}, event='resync')
+        return
+    while True:
+        changes = subscriber.get(heartbeat)
+        if not changes and not subscriber.overflowed:
+            yield ': heartbeat\n\n'
+            continue
+        for change in changes:
+            if change['seq'] <= position:
+                continue
+            position = change['seq']
+            yield format_event(position, payload(change, subscriber.topics))
+        if subscriber.overflowed:
+            yield format_event(position, {'reason': 'client fell behind'}, event='resync')
+            return
@@ -0,0 +1,91 @@
+from sqlalchemy import String, case, cast, distinct, func, literal, literal_column, select, tuple_, union_all
+from models import db, Book, BookBookGenre
+
+FACETS = ('genre', 'publisher', 'price', 'decade')
+
+def book_conditions(ranges, publishers, genres):
+    book = Book.__table__
+    link = BookBookGenre.__table__
+    columns = {'price': book.c.price, 'year': book.c.publicationyear, 'pages': book.c.pages}
+    conditions = []
+    for name, (low, high) in ranges.items():
+        if low is not None:
+            conditions.append(columns[name] >= low)
+        if high is not None:
+            conditions.append(columns[name] <= high)
+    if publishers:
+        conditions.append(book.c.idpublisher.in_(publishers))
+    if genres:
+        conditions.append(book.c.isbn.in_(select(link.c.isbn).where(link.c.genreid.in_(genres))))
+    return conditions
+
+# Price buckets are labelled by their lower edge: [0, 10) -> 0, [10, 20) -> 10, ...
+# Constants are inlined rather than bound so that Postgres sees the grouped
+# expressions in SELECT, GROUPING() and GROUP BY as the same expression.
+def facet_expressions(price_edges):
+    book = Book.__table__
+    link = BookBookGenre.__table__
+    edges = [literal_column(repr(edge)) for edge in price_edges]
+    price = case(
+        *[(book.c.price < upper, lower) for lower, upper in zip(edges, edges[1:])],
+        else_=edges[-1],
+    )
+    return {
+        'genre': link.c.genreid,
+        'publisher': book.c.idpublisher,
+        'price': price,
+        'decade': book.c.publicationyear - book.c.publicationyear % literal_column('10'),
+    }
+
+def source(facets):
+    book = Book.__table__
+    link = BookBookGenre.__table__
+    if 'genre' in facets:
+        return book.outerjoin(link, link.c.isbn == book.c.isbn), func.count(distinct(book.c.isbn))
+    return book, func.count()
+
+# Postgres: one GROUPING SETS query, GROUPING() tells which facet a row belongs to
+def grouping_sets_statement(facets, conditions, expressions):
+    joined, count = source(facets)
+    columns = [expressions[name].label(name) for name in facets]
+    flags = [func.grouping(expressions[name]).label(f'grouping_{name}') for name in facets]
+    return (
+        select(*columns, *flags, count.label('total'))
+        .select_from(joined)
+        .where(*conditions)
+        .group_by(func.grouping_sets(*[tuple_(expressions[name]) for name in facets]))
+    )
+
+def grouping_sets_query(facets, conditions, expressions):
+    stmt = grouping_sets_statement(facets, conditions, expressions)
+    for row in db.session.execute(stmt).mappings():
+        for name in facets:
+            if row[f'grouping_{name}'] == 0:
+                yield name, row[name], row['total']
+
+# Other dialects: the same per-facet GROUP BYs combined with UNION ALL
+def union_query(facets, conditions, expressions):
+    parts = []
+    for name in facets:
+        joined, count = source((name,))
+        parts.append(
+            select(literal(name).label('facet'), cast(expressions[name], String).label('value'), count.label('total'))
+            .select_from(joined)
+            .where(*conditions)
+            .group_by(expressions[name])
+        )
+    for row in db.session.execute(union_all(*parts)):
+        yield row.facet, row.value, row.total
+
+def compute_facets(facets, ranges, publishers, genres, price_edges):
+    conditions = book_conditions(ranges, publishers, genres)
+    expressions = facet_expressions(price_edges)
+    if db.engine.dialect.name == 'postgresql':
+        rows = grouping_sets_query(facets, conditions, expressions)
+    else:
+        rows = union_query(facets, conditions, expressions)
+    counts = {name: {} for name in facets}
+    for name, value, total in rows:
+        if value is not None:
+            counts[name][str(value)] = total
+    return counts
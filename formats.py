@@ -0,0 +1,97 @@
+from datetime import date, datetime, time, timezone
+from flask import current_app, jsonify, request
+from sqlalchemy import select
+from models import db
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Collection endpoints answer in JSON, MessagePack or Arrow IPC stream format
+# depending on the Accept header. Rows come straight from a Core SELECT; the
+# Arrow path transposes each batch of row tuples into columns, so no per-row
+# dicts are built and dates, timestamps and floats keep their types.
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+ARROW = 'application/vnd.apache.arrow.stream'
+
+# Both encoders are optional dependencies; a missing one is reported once at
+# startup instead of only showing up as a 406 for clients that ask for it
+def init_formats(app):
+    for name, module, package in (('MessagePack', msgpack, 'msgpack'), ('Arrow', pyarrow, 'pyarrow')):
+        if module is None:
+            app.logger.warning('%s responses are disabled: %s is not installed', name, package)
+
+def offered():
+    types = [JSON]
+    if msgpack is not None:
+        types.append(MSGPACK)
+    if pyarrow is not None:
+        types.append(ARROW)
+    return types
+
+# Dates and naive timestamps (stored as UTC) become msgpack Timestamps
+def msgpack_default(value):
+    if isinstance(value, datetime):
+        return msgpack.Timestamp.from_datetime(value.replace(tzinfo=value.tzinfo or timezone.utc))
+    if isinstance(value, date):
+        return msgpack.Timestamp.from_datetime(datetime.combine(value, time(), timezone.utc))
+    raise TypeError(f'Cannot serialize {type(value).__name__}')
+
+def arrow_type(column):
+    python_type = column.type.python_type
+    if python_type is int:
+        return pyarrow.int64()
+    if python_type is float:
+        return pyarrow.float64()
+    if python_type is datetime:
+        return pyarrow.timestamp('us')
+    if python_type is date:
+        return pyarrow.date32()
+    if python_type is str:
+        return pyarrow.string()
+    return None
+
+def arrow_stream(result, columns, batch_rows):
+    schema = pyarrow.schema([
+        pyarrow.field(column.name, arrow_type(column), nullable=column.nullable) for column in columns
+    ])
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        for rows in result.partitions(batch_rows):
+            arrays = [
+                pyarrow.array(values, type=field.type) for values, field in zip(zip(*rows), schema)
+            ]
+            writer.write_batch(pyarrow.record_batch(arrays, schema=schema))
+    return sink.getvalue().to_pybytes()
+
+def collection_response(model, exclude=()):
+    mimetype = request.accept_mimetypes.best_match(offered()) if request.accept_mimetypes else JSON
+    if mimetype is None:
+        response = jsonify({'message': 'Supported formats: ' + ', '.join(offered())})
+        response.status_code = 406
+        return response
+    columns = [column for column in model.__table__.columns if column.name not in exclude]
+    stmt = select(*columns)
+    if mimetype == ARROW:
+        # Read from a server-side cursor one batch at a time, so only the
+        # Arrow batches are held in memory rather than every row tuple
+        batch_rows = current_app.config['ARROW_BATCH_ROWS']
+        result = db.session.execute(stmt.execution_options(yield_per=batch_rows))
+        body = arrow_stream(result, columns, batch_rows)
+    elif mimetype == MSGPACK:
+        body = msgpack.packb([row._asdict() for row in db.session.execute(stmt)], default=msgpack_default)
+    else:
+        response = jsonify([row._asdict() for row in db.session.execute(stmt)])
+        response.vary.add('Accept')
+        return response
+    response = current_app.response_class(body, mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
@@ -0,0 +1,20 @@
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('THREADS', 4))
+# gthread holds one thread per open /events stream; nodes serving thousands of
+# SSE clients should run WORKER_CLASS=gevent instead
+worker_class = os.environ.get('WORKER_CLASS', 'gthread')
+preload_app = True
+timeout = 30
+graceful_timeout = 30
+
+# The master disposed its engine in warm_up(); drop any connection opened
+# between warm-up and fork in each child as well. close=False leaves those
+# sockets to the master instead of closing them from the child.
+def post_fork(server, worker):
+    from models import db
+    with server.app.wsgi().app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,61 @@
+from sqlalchemy import inspect, text
+from models import db
+
+# Ordered schema changes for databases created before the column/index existed.
+# Every step is idempotent so it is safe to run right after db.create_all().
+
+def add_column(conn, table, name, ddl):
+    columns = {column['name'] for column in inspect(conn).get_columns(table)}
+    if name not in columns:
+        conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}'))
+
+def row_versions(conn):
+    for table in ('book', 'inventory', 'wishlist'):
+        add_column(conn, table, 'version', 'INTEGER NOT NULL DEFAULT 1')
+
+# Creates every index declared on the models that the database is missing
+def create_indexes(conn):
+    inspector = inspect(conn)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn)
+
+# Postgres only: GiST index over the closed validity range of each contract
+def contract_validity_index(conn):
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_contracts_validity ON contracts "
+            "USING gist (daterange(startdate, enddate, '[]'))"
+        ))
+
+# The catalog snapshot and contract index follow the outbox; their former
+# change-marker tables are no longer written
+def drop_change_markers(conn):
+    for table in ('bookchange', 'contractchange'):
+        conn.execute(text(f'DROP TABLE IF EXISTS {table}'))
+
+MIGRATIONS = [
+    ('0001_row_versions', row_versions),
+    ('0002_foreign_key_indexes', create_indexes),
+    ('0003_contract_validity_index', contract_validity_index),
+    ('0004_outbox_table_seq_index', create_indexes),
+    ('0005_drop_change_markers', drop_change_markers),
+]
+
+def upgrade():
+    with db.engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_migrations ('
+            'id VARCHAR PRIMARY KEY, '
+            'applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)'
+        ))
+        applied = {row[0] for row in conn.execute(text('SELECT id FROM schema_migrations'))}
+        for migration_id, migrate in MIGRATIONS:
+            if migration_id in applied:
+                continue
+            migrate(conn)
+            conn.execute(text('INSERT INTO schema_migrations (id) VALUES (:id)'), {'id': migration_id})
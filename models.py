@@ -25,14 +25,16 @@ class Book(db.Model):
     publicationyear = db.Column(db.Integer, nullable=False)
     pages = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Float, nullable=False)
-    idpublisher = db.Column(db.String, db.ForeignKey('publisher.idpublisher'))
+    idpublisher = db.Column(db.String, db.ForeignKey('publisher.idpublisher'), index=True)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
 
 class BookStore(db.Model):
     __tablename__ = 'bookstore'
     __table_args__ = {'extend_existing': True}
     storeid = db.Column(db.Integer, primary_key=True)
     location = db.Column(db.String, nullable=False)
-    managerid = db.Column(db.Integer, db.ForeignKey('manager.managerid'))
+    managerid = db.Column(db.Integer, db.ForeignKey('manager.managerid'), index=True)
 
 class Author(db.Model):
     __tablename__ = 'author'
@@ -46,7 +48,7 @@ class BookAuthors(db.Model):
     __tablename__ = 'bookauthors'
     __table_args__ = {'extend_existing': True}
     isbn = db.Column(db.String, db.ForeignKey('book.isbn'), primary_key=True)
-    authornumber = db.Column(db.Integer, db.ForeignKey('author.authornumber'), primary_key=True)
+    authornumber = db.Column(db.Integer, db.ForeignKey('author.authornumber'), primary_key=True, index=True)
 
 class BookGenre(db.Model):
     __tablename__ = 'bookgenre'
@@ -59,7 +61,7 @@ class BookBookGenre(db.Model):
     __tablename__ = 'bookbookgenre'
     __table_args__ = {'extend_existing': True}
     isbn = db.Column(db.String, db.ForeignKey('book.isbn'), primary_key=True)
-    genreid = db.Column(db.Integer, db.ForeignKey('bookgenre.genreid'), primary_key=True)
+    genreid = db.Column(db.Integer, db.ForeignKey('bookgenre.genreid'), primary_key=True, index=True)
 
 class Supplier(db.Model):
     __tablename__ = 'supplier'
@@ -73,16 +75,16 @@ class SupplierBooks(db.Model):
     __tablename__ = 'supplierbooks'
     __table_args__ = {'extend_existing': True}
     supplierid = db.Column(db.Integer, db.ForeignKey('supplier.supplierid'), primary_key=True)
-    isbn = db.Column(db.String, db.ForeignKey('book.isbn'), primary_key=True)
+    isbn = db.Column(db.String, db.ForeignKey('book.isbn'), primary_key=True, index=True)
 
 class OrderSupplies(db.Model):
     __tablename__ = 'ordersupplies'
     __table_args__ = {'extend_existing': True}
     ordersuppliesid = db.Column(db.Integer, primary_key=True)
-    supplierid = db.Column(db.Integer, db.ForeignKey('supplier.supplierid'))
+    supplierid = db.Column(db.Integer, db.ForeignKey('supplier.supplierid'), index=True)
     suppliesorderdate = db.Column(db.Date, nullable=False)
     ordersupplyquantity = db.Column(db.Integer, nullable=False)
-    storeid = db.Column(db.Integer, db.ForeignKey('bookstore.storeid'))
+    storeid = db.Column(db.Integer, db.ForeignKey('bookstore.storeid'), index=True)
 
 class Customer(db.Model):
     __tablename__ = 'customer'
@@ -95,7 +97,7 @@ class OnlineAccount(db.Model):
     __tablename__ = 'onlineaccount'
     __table_args__ = {'extend_existing': True}
     accountid = db.Column(db.Integer, primary_key=True)
-    customernumber = db.Column(db.Integer, db.ForeignKey('customer.customernumber'))
+    customernumber = db.Column(db.Integer, db.ForeignKey('customer.customernumber'), index=True)
     customeremail = db.Column(db.String, nullable=False)
     username = db.Column(db.String, nullable=False)
     password = db.Column(db.String, nullable=False)
@@ -103,10 +105,13 @@ class OnlineAccount(db.Model):
 
 class BookReviews(db.Model):
     __tablename__ = 'bookreviews'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_bookreviews_isbn_reviewdate', 'isbn', 'reviewdate'),
+        {'extend_existing': True},
+    )
     reviewid = db.Column(db.Integer, primary_key=True)
     isbn = db.Column(db.String, db.ForeignKey('book.isbn'))
-    customernumber = db.Column(db.Integer, db.ForeignKey('customer.customernumber'))
+    customernumber = db.Column(db.Integer, db.ForeignKey('customer.customernumber'), index=True)
     rating = db.Column(db.Integer, nullable=False)
     reviewdate = db.Column(db.Date, nullable=False)
 
@@ -114,7 +119,7 @@ class CustomerFeedback(db.Model):
     __tablename__ = 'customerfeedback'
     __table_args__ = {'extend_existing': True}
     feedbackid = db.Column(db.Integer, primary_key=True)
-    customernumber = db.Column(db.Integer, db.ForeignKey('customer.customernumber'))
+    customernumber = db.Column(db.Integer, db.ForeignKey('customer.customernumber'), index=True)
     feedbackdate = db.Column(db.Date, nullable=False)
     feedbacktext = db.Column(db.Text, nullable=False)
 
@@ -127,23 +132,28 @@ class Staff(db.Model):
     staffdateadded = db.Column(db.Date, nullable=False)
     staffemail = db.Column(db.String, nullable=False)
     staffaddress = db.Column(db.String, nullable=False)
-    storeid = db.Column(db.Integer, db.ForeignKey('bookstore.storeid'))
+    storeid = db.Column(db.Integer, db.ForeignKey('bookstore.storeid'), index=True)
 
 class Inventory(db.Model):
     __tablename__ = 'inventory'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_inventory_bookid_storeid', 'bookid', 'storeid', postgresql_include=['quantity']),
+        {'extend_existing': True},
+    )
     inventoryid = db.Column(db.Integer, primary_key=True)
     bookid = db.Column(db.String, db.ForeignKey('book.isbn'))
     quantity = db.Column(db.Integer, nullable=False)
-    supplierid = db.Column(db.Integer, db.ForeignKey('supplier.supplierid'))
-    storeid = db.Column(db.Integer, db.ForeignKey('bookstore.storeid'))
+    supplierid = db.Column(db.Integer, db.ForeignKey('supplier.supplierid'), index=True)
+    storeid = db.Column(db.Integer, db.ForeignKey('bookstore.storeid'), index=True)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
 
 class Contracts(db.Model):
     __tablename__ = 'contracts'
     __table_args__ = {'extend_existing': True}
     contractid = db.Column(db.Integer, primary_key=True)
-    supplierid = db.Column(db.Integer, db.ForeignKey('supplier.supplierid'))
-    idpublisher = db.Column(db.String, db.ForeignKey('publisher.idpublisher'))
+    supplierid = db.Column(db.Integer, db.ForeignKey('supplier.supplierid'), index=True)
+    idpublisher = db.Column(db.String, db.ForeignKey('publisher.idpublisher'), index=True)
     startdate = db.Column(db.Date, nullable=False)
     enddate = db.Column(db.Date, nullable=False)
     contractdetails = db.Column(db.Text, nullable=False)
@@ -152,16 +162,84 @@ class Wishlist(db.Model):
     __tablename__ = 'wishlist'
     __table_args__ = {'extend_existing': True}
     wishlistitemid = db.Column(db.Integer, primary_key=True)
-    customernumber = db.Column(db.Integer, db.ForeignKey('customer.customernumber'))
+    customernumber = db.Column(db.Integer, db.ForeignKey('customer.customernumber'), index=True)
     totalprice = db.Column(db.Float, nullable=False)
     wishlistquantity = db.Column(db.Integer, nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
 
 class WishlistItems(db.Model):
     __tablename__ = 'wishlistitems'
     __table_args__ = {'extend_existing': True}
     wishlistitemid = db.Column(db.Integer, db.ForeignKey('wishlist.wishlistitemid'), primary_key=True)
-    isbn = db.Column(db.String, db.ForeignKey('book.isbn'), primary_key=True)
+    isbn = db.Column(db.String, db.ForeignKey('book.isbn'), primary_key=True, index=True)
+    quantity = db.Column(db.Integer, nullable=False)
+
+# Change feed for downstream consumers, appended by every source-table write (see outbox.py)
+class Outbox(db.Model):
+    __tablename__ = 'outbox'
+    __table_args__ = (
+        db.Index('ix_outbox_tablename_pk_seq', 'tablename', 'pk', 'seq'),
+        db.Index('ix_outbox_tablename_seq', 'tablename', 'seq'),
+        {'extend_existing': True},
+    )
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    tablename = db.Column(db.String, nullable=False)
+    pk = db.Column(db.String, nullable=False)
+    op = db.Column(db.String, nullable=False)
+    data = db.Column(db.Text)
+    createdat = db.Column(db.DateTime, nullable=False, index=True)
+
+# Pre-aggregated OrderSupplies per day and per month (period = first day).
+# Missing supplier/store ids are stored as 0 so they can be part of the key.
+class SuppliesDaily(db.Model):
+    __tablename__ = 'suppliesdaily'
+    __table_args__ = {'extend_existing': True}
+    period = db.Column(db.Date, primary_key=True)
+    supplierid = db.Column(db.Integer, primary_key=True)
+    storeid = db.Column(db.Integer, primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+
+class SuppliesMonthly(db.Model):
+    __tablename__ = 'suppliesmonthly'
+    __table_args__ = {'extend_existing': True}
+    period = db.Column(db.Date, primary_key=True)
+    supplierid = db.Column(db.Integer, primary_key=True)
+    storeid = db.Column(db.Integer, primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+
+# Per-week document frequency of feedback terms (week = Monday of the ISO
+# week), maintained incrementally from CustomerFeedback (see trending.py)
+class FeedbackTerms(db.Model):
+    __tablename__ = 'feedbackterms'
+    __table_args__ = (
+        db.Index('ix_feedbackterms_week_documents', 'week', 'documents'),
+        {'extend_existing': True},
+    )
+    week = db.Column(db.Date, primary_key=True)
+    term = db.Column(db.String, primary_key=True)
+    documents = db.Column(db.Integer, nullable=False, default=0)
+
+class FeedbackWeeks(db.Model):
+    __tablename__ = 'feedbackweeks'
+    __table_args__ = {'extend_existing': True}
+    week = db.Column(db.Date, primary_key=True)
+    documents = db.Column(db.Integer, nullable=False, default=0)
+
+# Output of the batch reorder engine, one row per (store, isbn) below its reorder point
+class ReorderSuggestion(db.Model):
+    __tablename__ = 'reordersuggestion'
+    __table_args__ = {'extend_existing': True}
+    storeid = db.Column(db.Integer, primary_key=True)
+    isbn = db.Column(db.String, primary_key=True)
     quantity = db.Column(db.Integer, nullable=False)
+    dailyrate = db.Column(db.Float, nullable=False)
+    reorderpoint = db.Column(db.Float, nullable=False)
+    orderquantity = db.Column(db.Integer, nullable=False)
+    supplierid = db.Column(db.Integer)
+    computedon = db.Column(db.Date, nullable=False)
 
 
 def init_db():
@@ -190,3 +268,9 @@ Inventory.to_dict = to_dict
 Contracts.to_dict = to_dict
 Wishlist.to_dict = to_dict
 WishlistItems.to_dict = to_dict
+Outbox.to_dict = to_dict
+SuppliesDaily.to_dict = to_dict
+SuppliesMonthly.to_dict = to_dict
+ReorderSuggestion.to_dict = to_dict
+FeedbackTerms.to_dict = to_dict
+FeedbackWeeks.to_dict = to_dict
@@ -0,0 +1,233 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from models import db, Outbox
+
+# Transactional outbox: every write to a source table appends (table, pk, op,
+# row values) to the outbox in the same transaction, so downstream consumers
+# can sync incrementally by sequence number.
+#
+# ORM writes are captured by the flush hook below. Core statements that bypass
+# the unit of work (compare-and-swap updates, relative increments, bulk
+# deletes) call record_row()/record_deleted() themselves.
+
+# Derived or bookkeeping tables that consumers can rebuild on their own
+IGNORED_TABLES = {
+    'outbox', 'suppliesdaily', 'suppliesmonthly', 'reordersuggestion',
+    'feedbackterms', 'feedbackweeks',
+}
+REDACTED_COLUMNS = {'onlineaccount': {'password'}}
+
+def encode(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+def row_values(table, row):
+    redacted = REDACTED_COLUMNS.get(table.name, ())
+    return {column.name: row[column.name] for column in table.columns if column.name not in redacted}
+
+def pk_of(table, values):
+    return json.dumps([values[column.name] for column in table.primary_key.columns], default=encode)
+
+def entry(table, values, op):
+    return {
+        'tablename': table.name,
+        'pk': pk_of(table, values),
+        'op': op,
+        'data': json.dumps(row_values(table, values), default=encode),
+        'createdat': datetime.utcnow(),
+    }
+
+def append(connection, entries):
+    if entries:
+        connection.execute(Outbox.__table__.insert(), entries)
+
+def record_row(table, pk, op='update'):
+    if table.name in IGNORED_TABLES:
+        return
+    pk_column = list(table.primary_key.columns)[0]
+    row = db.session.execute(select(table).where(pk_column == pk)).mappings().first()
+    if row is not None:
+        append(db.session.connection(), [entry(table, row, op)])
+
+# Records deletes, with their last values, for the rows a set-based DELETE is
+# about to remove
+def record_deleted(table, condition):
+    if table.name in IGNORED_TABLES:
+        return
+    rows = db.session.execute(select(table).where(condition)).mappings().all()
+    append(db.session.connection(), [entry(table, row, 'delete') for row in rows])
+
+@event.listens_for(Session, 'after_flush')
+def record_flush(session, flush_context):
+    entries = []
+    for obj, op in [(o, 'insert') for o in session.new] + [(o, 'update') for o in session.dirty] + [(o, 'delete') for o in session.deleted]:
+        table = getattr(obj, '__table__', None)
+        if table is None or table.name in IGNORED_TABLES:
+            continue
+        if op == 'update' and not session.is_modified(obj, include_collections=False):
+            continue
+        values = {column.name: getattr(obj, column.key) for column in table.columns}
+        entries.append(entry(table, values, op))
+    if entries:
+        append(session.connection(), entries)
+        session.info['outbox_written'] = True
+
+# Wakes long-polling /changes requests in this worker as soon as a commit
+# added records; commits in other workers are noticed by the poll interval.
+changes_committed = threading.Condition()
+
+@event.listens_for(Session, 'after_commit')
+def notify_commit(session):
+    if session.info.pop('outbox_written', False):
+        with changes_committed:
+            changes_committed.notify_all()
+
+@event.listens_for(Session, 'after_rollback')
+def clear_flag(session):
+    session.info.pop('outbox_written', None)
+
+# Records newer than `since`, oldest first, up to the first gap in the
+# sequence. A missing sequence number belongs to a transaction that has not
+# committed yet (or rolled back); serving past it would let a consumer move
+# beyond that record before it becomes visible and never see it. A gap is
+# given up on as a rollback once the record after it is older than `max_age`
+# (OUTBOX_MAX_TRANSACTION_AGE), so every transaction that writes the outbox
+# must finish within that age; on Postgres, enforce it with statement_timeout
+# and idle_in_transaction_session_timeout. createdat is stamped by the writing
+# host, so clock skew between hosts has to be small against `max_age`.
+def read_changes(since, limit, max_age):
+    return follow(since, limit, max_age)[0]
+
+# Gaps readers of this process are held at: missing seq -> when a read first
+# stopped there. A burned sequence number (a rolled-back write) holds every
+# follower for up to `max_age`, so holds are logged and listed by /outbox/gaps,
+# and a gap that is finally given up on is logged with how long it held.
+held_gaps = {}
+held_gaps_lock = threading.Lock()
+
+def hold_at(seq, max_age):
+    with held_gaps_lock:
+        if seq in held_gaps:
+            return
+        held_gaps[seq] = time.monotonic()
+    current_app.logger.warning('Outbox readers held at seq %d until it commits or %s s pass', seq, max_age)
+
+def release(since, position, skipped):
+    with held_gaps_lock:
+        passed = {seq: held_gaps.pop(seq) for seq in list(held_gaps) if since < seq <= position}
+    for seq, started in passed.items():
+        if seq in skipped:
+            current_app.logger.warning(
+                'Outbox seq %d never committed; readers were held for %.1f s', seq, time.monotonic() - started
+            )
+
+def open_gaps():
+    now = time.monotonic()
+    with held_gaps_lock:
+        return [{'seq': seq, 'held_for': round(now - started, 1)} for seq, started in sorted(held_gaps.items())]
+
+# The gap-aware read for followers of some tables only: returns their records
+# and the position read up to, which may be past the last record returned.
+def follow(since, limit, max_age, tables=None):
+    outbox = Outbox.__table__
+    stmt = select(outbox).where(outbox.c.seq > since).order_by(outbox.c.seq).limit(limit)
+    expired = datetime.utcnow() - timedelta(seconds=max_age)
+    changes, position, skipped = [], since, set()
+    for row in db.session.execute(stmt).mappings():
+        if row['seq'] != position + 1:
+            if row['createdat'] > expired:
+                hold_at(position + 1, max_age)
+                break
+            skipped.add(position + 1)
+        position = row['seq']
+        if tables is None or row['tablename'] in tables:
+            changes.append({
+                **row, 'data': json.loads(row['data']) if row['data'] else None, 'pk': json.loads(row['pk']),
+                'createdat': row['createdat'].isoformat(),
+            })
+    if held_gaps:
+        release(since, position, skipped)
+    return changes, position
+
+# A position every open transaction is past: the newest record older than
+# `max_age`. Followers that start without a position start here, and pick up
+# younger records through the gap-aware read.
+def settled_seq(max_age):
+    expired = datetime.utcnow() - timedelta(seconds=max_age)
+    return db.session.execute(
+        select(func.coalesce(func.max(Outbox.seq), 0)).where(Outbox.createdat <= expired)
+    ).scalar()
+
+def wait_for_changes(since, limit, max_age, timeout, poll):
+    deadline = time.monotonic() + timeout
+    while True:
+        changes = read_changes(since, limit, max_age)
+        remaining = deadline - time.monotonic()
+        if changes or remaining <= 0:
+            return changes
+        db.session.rollback()
+        with changes_committed:
+            changes_committed.wait(min(poll, remaining))
+
+# Log compaction: records older than the horizon are dropped when a newer
+# record exists for the same row, so consumers starting from scratch replay at
+# most one record per row for the compacted range.
+def compact(older_than):
+    outbox = Outbox.__table__
+    newer = outbox.alias('newer')
+    horizon = datetime.utcnow() - older_than
+    latest = (
+        select(func.max(newer.c.seq))
+        .where(newer.c.tablename == outbox.c.tablename, newer.c.pk == outbox.c.pk)
+        .scalar_subquery()
+    )
+    result = db.session.execute(outbox.delete().where(outbox.c.createdat < horizon, outbox.c.seq < latest))
+    db.session.commit()
+    return result.rowcount
+
+# Per-worker in-memory state kept current from the outbox. load() records a
+# settled position and then builds the state from the tables, so every change
+# after that position is applied again by refresh(), which rebuilds only the
+# keys the new records touch, at most once per interval. Subclasses set
+# `tables` and implement keys(change), build_state() and apply(state, keys).
+class OutboxFollower:
+    tables = ()
+    batch = 1000
+
+    def __init__(self):
+        self.state = None
+        self.seq = 0
+        self.checked = 0.0
+        self.lock = threading.Lock()
+
+    def load(self):
+        self.seq = settled_seq(current_app.config['OUTBOX_MAX_TRANSACTION_AGE'])
+        self.state = self.build_state()
+        self.checked = time.monotonic()
+
+    def refresh(self, interval):
+        if self.state is not None and time.monotonic() - self.checked < interval:
+            return self.state
+        with self.lock:
+            if self.state is None:
+                self.load()
+                return self.state
+            if time.monotonic() - self.checked < interval:
+                return self.state
+            keys, seq = set(), self.seq
+            while True:
+                changes, position = follow(seq, self.batch, current_app.config['OUTBOX_MAX_TRANSACTION_AGE'], self.tables)
+                for change in changes:
+                    keys.update(self.keys(change))
+                if position - seq < self.batch:
+                    break
+                seq = position
+            if keys:
+                self.state = self.apply(self.state, keys)
+            self.seq = position
+            self.checked = time.monotonic()
+            return self.state
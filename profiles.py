@@ -0,0 +1,91 @@
+import json
+from sqlalchemy import bindparam, text
+from models import db
+
+# Customer 360: the customer row plus accounts, recent reviews, recent feedback
+# and wishlists (with their items), each section aggregated to a JSON array by
+# the database so a whole profile comes back as one row in one round trip.
+
+SECTIONS = ('accounts', 'reviews', 'feedback', 'wishlist')
+
+# Per dialect: JSON object builder, array aggregate, and a wrapper that keeps a
+# nested JSON value from being embedded as a string
+JSON_FUNCTIONS = {
+    'postgresql': ('json_build_object', 'json_agg', '{}', "'[]'::json"),
+    'sqlite': ('json_object', 'json_group_array', 'json({})', "json('[]')"),
+}
+
+def json_object(dialect, fields):
+    build = JSON_FUNCTIONS[dialect][0]
+    pairs = ', '.join(f"'{name}', {expression}" for name, expression in fields)
+    return f'{build}({pairs})'
+
+# Aggregates the rows of a limited, ordered subquery into a JSON array
+def json_array(dialect, fields, source, order_by, limit=None, nested_fields=()):
+    aggregate, nested, empty = JSON_FUNCTIONS[dialect][1:]
+    columns = ', '.join(f'{expression} AS {name}' for name, expression in fields)
+    inner = f'SELECT {columns} FROM {source} ORDER BY {order_by}'
+    if limit is not None:
+        inner += f' LIMIT {int(limit)}'
+    obj = json_object(dialect, [
+        (name, nested.format(f's.{name}') if name in nested_fields else f's.{name}') for name, _ in fields
+    ])
+    order = ', '.join(f's.{part}' for part in order_by.split(', '))
+    if dialect == 'postgresql':
+        array = f'{aggregate}({obj} ORDER BY {order})'
+    else:
+        array = f'{aggregate}({obj})'
+    return nested.format(f'(SELECT coalesce({array}, {empty}) FROM ({inner}) AS s)')
+
+def profile_sql(dialect, limits):
+    items = json_array(
+        dialect,
+        [('isbn', 'isbn'), ('quantity', 'quantity')],
+        'wishlistitems WHERE wishlistitems.wishlistitemid = w.wishlistitemid',
+        'isbn',
+    )
+    sections = {
+        'accounts': json_array(
+            dialect,
+            [('accountid', 'accountid'), ('customeremail', 'customeremail'), ('username', 'username'), ('accountstatus', 'accountstatus')],
+            'onlineaccount WHERE onlineaccount.customernumber = c.customernumber',
+            'accountid', limits['accounts'],
+        ),
+        'reviews': json_array(
+            dialect,
+            [('reviewid', 'reviewid'), ('isbn', 'isbn'), ('rating', 'rating'), ('reviewdate', 'reviewdate')],
+            'bookreviews WHERE bookreviews.customernumber = c.customernumber',
+            'reviewdate DESC, reviewid DESC', limits['reviews'],
+        ),
+        'feedback': json_array(
+            dialect,
+            [('feedbackid', 'feedbackid'), ('feedbackdate', 'feedbackdate'), ('feedbacktext', 'feedbacktext')],
+            'customerfeedback WHERE customerfeedback.customernumber = c.customernumber',
+            'feedbackdate DESC, feedbackid DESC', limits['feedback'],
+        ),
+        'wishlist': json_array(
+            dialect,
+            [('wishlistitemid', 'w.wishlistitemid'), ('totalprice', 'w.totalprice'), ('wishlistquantity', 'w.wishlistquantity'), ('items', items)],
+            'wishlist AS w WHERE w.customernumber = c.customernumber',
+            'wishlistitemid', limits['wishlist'], nested_fields=('items',),
+        ),
+    }
+    return text(
+        'SELECT c.customernumber, c.customername, c.customeraddress, '
+        + ', '.join(f'{sql} AS {name}' for name, sql in sections.items())
+        + ' FROM customer AS c WHERE c.customernumber IN :customernumbers ORDER BY c.customernumber'
+    ).bindparams(bindparam('customernumbers', expanding=True))
+
+def load_profiles(customernumbers, limits):
+    dialect = db.engine.dialect.name
+    if dialect not in JSON_FUNCTIONS:
+        raise ValueError(f'Customer profiles are not supported on {dialect}')
+    rows = db.session.execute(profile_sql(dialect, limits), {'customernumbers': list(customernumbers)}).mappings()
+    profiles = []
+    for row in rows:
+        profile = dict(row)
+        for name in SECTIONS:
+            if isinstance(profile[name], str):
+                profile[name] = json.loads(profile[name])
+        profiles.append(profile)
+    return profiles
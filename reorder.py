@@ -0,0 +1,135 @@
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import and_, func, select
+from models import db, Book, BookStore, Contracts, Inventory, ReorderSuggestion, SupplierBooks, SuppliesDaily
+
+# Batch reorder engine. Everything per (store, isbn) is evaluated on NumPy
+# arrays; the database only supplies columns and receives the results.
+#
+# OrderSupplies has no ISBN, so the daily consumption of a title is estimated
+# from what its store received from that title's supplier over the window,
+# spread evenly across the titles that supplier stocks at the store.
+
+def batches(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+# (isbn, supplier) pairs where the supplier lists the book and holds an active
+# contract with its publisher, reduced to sorted arrays for vectorized lookups
+def eligible_suppliers(today):
+    book = Book.__table__
+    listing = SupplierBooks.__table__
+    contract = Contracts.__table__
+    rows = db.session.execute(
+        select(listing.c.isbn, listing.c.supplierid)
+        .join(book, book.c.isbn == listing.c.isbn)
+        .join(contract, and_(
+            contract.c.supplierid == listing.c.supplierid,
+            contract.c.idpublisher == book.c.idpublisher,
+            contract.c.startdate <= today,
+            contract.c.enddate >= today,
+        ))
+        .distinct()
+    ).all()
+    isbns = np.array([row[0] for row in rows], dtype=str)
+    suppliers = np.array([row[1] for row in rows], dtype=np.int64)
+    codes, inverse = np.unique(isbns, return_inverse=True)
+    width = int(suppliers.max()) + 1 if len(suppliers) else 1
+    pairs = np.unique(inverse.astype(np.int64) * width + suppliers)
+    preferred = np.full(len(codes), np.iinfo(np.int64).max)
+    np.minimum.at(preferred, inverse, suppliers)
+    return codes, pairs, width, preferred
+
+def supply_rates(today, window_days):
+    daily = SuppliesDaily.__table__
+    rows = db.session.execute(
+        select(daily.c.storeid, daily.c.supplierid, func.sum(daily.c.quantity))
+        .where(daily.c.period > today - timedelta(days=window_days), daily.c.period <= today)
+        .group_by(daily.c.storeid, daily.c.supplierid)
+    ).all()
+    return {(store, supplier): quantity / window_days for store, supplier, quantity in rows}
+
+def load_inventory(storeids):
+    inventory = Inventory.__table__
+    rows = db.session.execute(
+        select(inventory.c.storeid, inventory.c.bookid, inventory.c.supplierid, inventory.c.quantity)
+        .where(inventory.c.storeid.in_(storeids), inventory.c.bookid.isnot(None))
+    ).all()
+    count = len(rows)
+    store = np.fromiter((row[0] for row in rows), dtype=np.int64, count=count)
+    isbn = np.array([row[1] for row in rows], dtype=str)
+    supplier = np.fromiter((row[2] or 0 for row in rows), dtype=np.int64, count=count)
+    quantity = np.fromiter((row[3] for row in rows), dtype=np.int64, count=count)
+    return store, isbn, supplier, quantity
+
+def compute_batch(storeids, rates, eligible, settings, today):
+    store, isbn, supplier, quantity = load_inventory(storeids)
+    if not len(store):
+        return []
+
+    # Daily rate per row: the (store, supplier) supply rate split over its titles
+    group = store * (int(supplier.max()) + 1) + supplier
+    groups, inverse, titles = np.unique(group, return_inverse=True, return_counts=True)
+    group_store = groups // (int(supplier.max()) + 1)
+    group_supplier = groups % (int(supplier.max()) + 1)
+    group_rate = np.array([rates.get((int(s), int(p)), 0.0) for s, p in zip(group_store, group_supplier)])
+    rate = (group_rate / titles)[inverse]
+
+    # Eligible current supplier of each row (none = int64 max), and the lowest
+    # eligible supplier of its title as the fallback (none = -1)
+    codes, pairs, width, preferred = eligible
+    unset = np.iinfo(np.int64).max
+    current = np.full(len(store), unset, dtype=np.int64)
+    fallback = np.full(len(store), -1, dtype=np.int64)
+    if len(codes):
+        position = np.clip(np.searchsorted(codes, isbn), 0, len(codes) - 1)
+        listed = codes[position] == isbn
+        current_ok = listed & (supplier < width) & np.isin(position.astype(np.int64) * width + supplier, pairs)
+        current = np.where(current_ok, supplier, unset)
+        fallback = np.where(listed, preferred[position], -1)
+
+    # A title stocked through several suppliers has one inventory row per
+    # supplier; it keeps the lowest of its current suppliers that is eligible
+    order = np.lexsort((isbn, store))
+    store, isbn, quantity, rate = store[order], isbn[order], quantity[order], rate[order]
+    current, fallback = current[order], fallback[order]
+    starts = np.flatnonzero(np.r_[True, (store[1:] != store[:-1]) | (isbn[1:] != isbn[:-1])])
+    store, isbn = store[starts], isbn[starts]
+    quantity = np.add.reduceat(quantity, starts)
+    rate = np.add.reduceat(rate, starts)
+    current = np.minimum.reduceat(current, starts)
+    chosen = np.where(current != unset, current, fallback[starts])
+
+    reorder_point = rate * (settings['lead_days'] + settings['safety_days'])
+    flagged = (rate > 0) & (quantity <= reorder_point)
+    order_quantity = np.maximum(np.ceil(rate * settings['cover_days']) - quantity, 1).astype(np.int64)
+
+    return [
+        {
+            'storeid': int(store[i]),
+            'isbn': str(isbn[i]),
+            'quantity': int(quantity[i]),
+            'dailyrate': float(rate[i]),
+            'reorderpoint': float(reorder_point[i]),
+            'orderquantity': int(order_quantity[i]),
+            'supplierid': int(chosen[i]) if chosen[i] >= 0 else None,
+            'computedon': today,
+        }
+        for i in np.flatnonzero(flagged)
+    ]
+
+def compute_reorders(settings, today=None):
+    today = today or date.today()
+    eligible = eligible_suppliers(today)
+    rates = supply_rates(today, settings['window_days'])
+    storeids = [row[0] for row in db.session.execute(select(BookStore.storeid).order_by(BookStore.storeid))]
+    table = ReorderSuggestion.__table__
+    written = 0
+    db.session.execute(table.delete())
+    for stores in batches(storeids, settings['store_batch']):
+        suggestions = compute_batch(stores, rates, eligible, settings, today)
+        for chunk in batches(suggestions, 10000):
+            db.session.execute(table.insert(), chunk)
+        written += len(suggestions)
+    db.session.commit()
+    return written
@@ -0,0 +1,43 @@
+import pytest
+from config import Config
+from app import create_app
+from models import db, init_db, Book, Publisher
+
+def test_config(path, **settings):
+    return type('TestConfig', (Config,), {
+        'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path / "test.db"}', **settings,
+    })
+
+@pytest.fixture
+def make_app(tmp_path):
+    def make(**settings):
+        app = create_app(test_config(tmp_path, **settings))
+        with app.app_context():
+            init_db()
+        return app
+    return make
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def books(app):
+    db.session.add(Publisher(
+        idpublisher='P1', namepublisher='Penguin', citypublisher='London',
+        telephonepublisher='555', countrypublisher='UK',
+    ))
+    db.session.add_all([
+        Book(isbn='111', bookname='Dune', publicationyear=1965, pages=412, price=9.99, idpublisher='P1'),
+        Book(isbn='222', bookname='Emma', publicationyear=1815, pages=474, price=4.5, idpublisher='P1'),
+        Book(isbn='333', bookname='Ubik', publicationyear=1969, pages=202, price=12.0, idpublisher='P1'),
+    ])
+    db.session.commit()
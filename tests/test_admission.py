@@ -0,0 +1,36 @@
+import time
+import pytest
+import app as app_module
+from admission import Limiter, Overloaded, route_class
+
+def test_route_class():
+    assert route_class(None, 'GET', None) is None
+    assert route_class('api.get_events', 'GET', {}) is None
+    assert route_class('api.bulk_delete_books', 'POST', {}) == 'scan'
+    assert route_class('api.manage_books', 'POST', {}) == 'write'
+    assert route_class('api.delete_book', 'DELETE', {'isbn': '1'}) == 'write'
+    assert route_class('api.get_book', 'GET', {'isbn': '1'}) == 'lookup'
+    assert route_class('api.manage_books', 'GET', {}) == 'scan'
+
+def test_unknown_route_takes_no_slot(client):
+    client.get('/no/such/route')
+    assert all(stats['admitted'] == 0 for stats in client.get('/admission').get_json().values())
+
+def test_limiter_sheds_when_queue_is_full():
+    limiter = Limiter('scan', limit=1, min_limit=1, max_limit=2, queue=0, queue_timeout=0.1, target_latency=1.0)
+    limiter.acquire()
+    with pytest.raises(Overloaded):
+        limiter.acquire()
+    limiter.release(0.01)
+    limiter.acquire()
+    assert limiter.stats()['shed_full'] == 1
+
+def test_slow_logins_leave_the_write_limit(client, monkeypatch):
+    def slow_check(stored, password):
+        time.sleep(0.3)
+        return False, False
+    monkeypatch.setattr(app_module, 'check_in_pool', slow_check)
+    for _ in range(3):
+        assert client.post('/login', json={'username': 'u', 'password': 'p'}).status_code == 401
+    stats = client.get('/admission').get_json()['write']
+    assert (stats['limit'], stats['admitted']) == (16, 0)
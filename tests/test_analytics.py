@@ -0,0 +1,66 @@
+from datetime import date
+import pytest
+from analytics import query_supplies, rebuild_rollups, record_supply
+from models import db, OrderSupplies, SuppliesDaily, SuppliesMonthly
+
+GROUPINGS = [[], ['supplier'], ['store'], ['supplier', 'store']]
+
+def rollups():
+    return {
+        (grain, tuple(group_by)): query_supplies(grain, group_by)
+        for grain in ('day', 'month') for group_by in GROUPINGS
+    }
+
+def add(orderid, day, quantity, supplierid=1, storeid=1):
+    order = OrderSupplies(
+        ordersuppliesid=orderid, supplierid=supplierid, suppliesorderdate=day,
+        ordersupplyquantity=quantity, storeid=storeid,
+    )
+    db.session.add(order)
+    record_supply(order)
+    db.session.commit()
+
+# The write paths of /ordersupplies: the old state is subtracted, the new added
+def change(orderid, **values):
+    order = db.session.get(OrderSupplies, orderid)
+    record_supply(order, -1)
+    for name, value in values.items():
+        setattr(order, name, value)
+    record_supply(order)
+    db.session.commit()
+
+def delete(orderid):
+    order = db.session.get(OrderSupplies, orderid)
+    db.session.delete(order)
+    record_supply(order, -1)
+    db.session.commit()
+
+@pytest.fixture
+def orders(app):
+    add(1, date(2024, 1, 5), 10)
+    add(2, date(2024, 1, 5), 5, storeid=2)
+    add(3, date(2024, 1, 20), 7, supplierid=2)
+    add(4, date(2024, 2, 1), 3)
+    add(5, date(2024, 2, 29), 8, supplierid=None)
+    change(1, ordersupplyquantity=12)
+    change(3, suppliesorderdate=date(2024, 3, 2), storeid=3)
+    change(4, supplierid=2, storeid=2)
+    delete(2)
+    delete(5)
+
+def test_incremental_matches_rebuild(orders):
+    incremental = rollups()
+    rebuild_rollups()
+    assert rollups() == incremental
+    assert incremental[('month', ())] == [
+        {'quantity': 12, 'orders': 1, 'period': '2024-01-01'},
+        {'quantity': 3, 'orders': 1, 'period': '2024-02-01'},
+        {'quantity': 7, 'orders': 1, 'period': '2024-03-01'},
+    ]
+
+def test_partial_rebuild_matches(orders):
+    incremental = rollups()
+    rebuild_rollups(date(2024, 2, 10), date(2024, 3, 1))
+    assert rollups() == incremental
+    assert db.session.query(SuppliesDaily).filter(SuppliesDaily.orders == 0).count() == 0
+    assert db.session.query(SuppliesMonthly).filter(SuppliesMonthly.period == date(2024, 2, 1)).count() == 1
@@ -0,0 +1,46 @@
+import os
+import signal
+import time
+import pytest
+from auth import HashPool, PoolBusy, hash_password, verify_password
+
+def kill_worker():
+    os.kill(os.getpid(), signal.SIGKILL)
+
+def test_hash_and_verify():
+    stored = hash_password('secret', 2 ** 10, 8, 1)
+    assert verify_password(stored, 'secret', 2 ** 10, 8, 1) == (True, False)
+    assert verify_password(stored, 'wrong', 2 ** 10, 8, 1) == (False, False)
+    assert verify_password(stored, 'secret', 2 ** 11, 8, 1) == (True, True)
+    assert verify_password('secret', 'secret', 2 ** 10, 8, 1) == (True, True)
+
+@pytest.fixture
+def pool(app):
+    app.config.update(AUTH_POOL_WORKERS=1, AUTH_POOL_QUEUE=1, AUTH_POOL_TIMEOUT=10)
+    pool = HashPool()
+    pool.run(os.getpid)  # spawns the worker outside the timed calls
+    yield pool
+    pool.executor.shutdown(cancel_futures=True)
+
+def test_timed_out_jobs_keep_their_slots(app, pool):
+    app.config['AUTH_POOL_TIMEOUT'] = 0.3
+    outcomes = []
+    for _ in range(8):
+        try:
+            pool.run(time.sleep, 1)
+        except PoolBusy as e:
+            outcomes.append(str(e))
+    # The first job holds the worker; the second times out and is cancelled
+    # while queued; the slot of the first is only freed when it finishes
+    assert outcomes[:2] == ['Password operation timed out'] * 2
+    assert set(outcomes[2:]) == {'Too many concurrent password operations'}
+    assert len(pool.executor._pending_work_items) <= 2
+    time.sleep(1)
+    app.config['AUTH_POOL_TIMEOUT'] = 10
+    assert pool.run(os.getpid) != os.getpid()
+
+def test_broken_pool_is_rebuilt(pool):
+    with pytest.raises(PoolBusy, match='failed'):
+        pool.run(kill_worker)
+    assert pool.executor is None
+    assert pool.run(os.getpid) != os.getpid()
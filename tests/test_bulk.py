@@ -0,0 +1,65 @@
+import pytest
+from bulk import build_filter
+from models import db, Book, BookBookGenre, BookGenre, Inventory, WishlistItems
+
+@pytest.fixture
+def dependents(books):
+    db.session.add(BookGenre(genreid=1, genretype='SF', genredescription='Science fiction'))
+    db.session.add_all([
+        BookBookGenre(isbn='111', genreid=1),
+        BookBookGenre(isbn='333', genreid=1),
+        Inventory(inventoryid=1, bookid='111', quantity=3),
+        Inventory(inventoryid=2, bookid='111', quantity=1),
+        Inventory(inventoryid=3, bookid='222', quantity=5),
+        WishlistItems(wishlistitemid=1, isbn='333', quantity=1),
+    ])
+    db.session.commit()
+
+def test_dry_run_counts(client, dependents):
+    response = client.post('/books/bulk_delete', json={
+        'filter': {'publicationyear': {'gt': 1900}}, 'dry_run': True,
+    })
+    assert response.status_code == 200
+    counts = response.get_json()['counts']
+    assert counts['book'] == 2
+    assert counts['bookbookgenre'] == 2
+    assert counts['inventory'] == 2
+    assert counts['wishlistitems'] == 1
+    assert db.session.query(Book).count() == 3
+
+def test_dry_run_matches_delete(client, dependents):
+    spec = {'isbn': {'in': ['111', '222']}}
+    planned = client.post('/books/bulk_delete', json={'filter': spec, 'dry_run': True}).get_json()['counts']
+    deleted = client.post('/books/bulk_delete', json={'filter': spec}).get_json()['counts']
+    assert planned == deleted
+    assert [book.isbn for book in db.session.query(Book)] == ['333']
+
+def test_dry_run_must_be_boolean(client, dependents):
+    response = client.post('/books/bulk_delete', json={'filter': {'isbn': '111'}, 'dry_run': 'false'})
+    assert response.status_code == 400
+    assert db.session.query(Book).count() == 3
+
+@pytest.mark.parametrize('spec', [
+    None,
+    {},
+    ['isbn'],
+    {'title': 'Dune'},
+    {'isbn': {}},
+    {'isbn': {'like': 'D%'}},
+    {'isbn': {'in': '111'}},
+    {'isbn': {'in': [['111']]}},
+    {'price': {'lt': [10]}},
+    {'price': {'gte': None}},
+    {'isbn': {'eq': {'nested': 1}}},
+])
+def test_build_filter_rejects(spec):
+    with pytest.raises(ValueError):
+        build_filter(Book.__table__, spec)
+
+def test_build_filter_accepts(app):
+    condition = build_filter(Book.__table__, {'isbn': {'in': ['111']}, 'price': {'lt': 10}, 'idpublisher': None})
+    assert str(condition) == 'book.isbn IN (__[POSTCOMPILE_isbn_1]) AND book.price < :price_1 AND book.idpublisher IS NULL'
+
+@pytest.mark.parametrize('body', [[{'filter': {'isbn': '111'}}], 'isbn', 1])
+def test_body_must_be_an_object(client, dependents, body):
+    assert client.post('/books/bulk_delete', json=body).status_code == 400
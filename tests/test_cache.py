@@ -0,0 +1,36 @@
+import time
+from cache import LRUCache
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+
+def test_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    cache = LRUCache(2, ttl=30)
+    cache.put('a', 1)
+    now[0] += 30
+    assert cache.get('a') == 1
+    now[0] += 1
+    assert cache.get('a') is None
+    assert not cache.entries
+
+def test_bounded_by_weight():
+    cache = LRUCache(10, weigh=len)
+    cache.put('a', b'12345')
+    cache.put('b', b'1234')
+    assert cache.weight == 9
+    cache.put('c', b'123')
+    assert cache.get('a') is None
+    assert (cache.get('b'), cache.get('c')) == (b'1234', b'123')
+    cache.put('b', b'1')
+    assert cache.weight == 4
+    cache.put('d', b'x' * 11)
+    assert cache.get('d') is None
+    assert cache.weight == 4
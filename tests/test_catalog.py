@@ -0,0 +1,53 @@
+from collections import namedtuple
+import numpy as np
+import pytest
+from catalog import build, empty_snapshot, filter_books
+
+BookRow = namedtuple('BookRow', 'isbn price publicationyear pages idpublisher')
+GenreRow = namedtuple('GenreRow', 'isbn genreid')
+
+@pytest.fixture
+def snapshot():
+    rows = [
+        BookRow('111', 9.99, 1965, 412, 'P1'),
+        BookRow('222', 4.50, 1815, 474, 'P2'),
+        BookRow('333', 12.00, 1969, 202, 'P1'),
+        BookRow('444', 20.00, 2001, 150, 'P3'),
+    ]
+    genre_rows = [GenreRow('111', 1), GenreRow('333', 1), GenreRow('333', 2), GenreRow('222', 3)]
+    return build(empty_snapshot(), np.zeros(0, dtype=bool), rows, genre_rows)
+
+NO_RANGES = {'price': (None, None), 'year': (None, None), 'pages': (None, None)}
+
+def ranges(**bounds):
+    return {**NO_RANGES, **bounds}
+
+def test_no_filter(snapshot):
+    assert filter_books(snapshot, NO_RANGES) == (4, ['111', '222', '333', '444'])
+
+def test_range_bounds_are_inclusive(snapshot):
+    assert filter_books(snapshot, ranges(price=(4.5, 12.0))) == (3, ['111', '222', '333'])
+    assert filter_books(snapshot, ranges(year=(1900, None))) == (3, ['111', '333', '444'])
+    assert filter_books(snapshot, ranges(pages=(None, 202))) == (2, ['333', '444'])
+
+def test_ranges_combine(snapshot):
+    assert filter_books(snapshot, ranges(price=(5, None), pages=(300, None))) == (1, ['111'])
+
+def test_publishers(snapshot):
+    assert filter_books(snapshot, NO_RANGES, publishers=['P1', 'P3']) == (3, ['111', '333', '444'])
+    assert filter_books(snapshot, NO_RANGES, publishers=['P9']) == (0, [])
+
+def test_genres_match_any(snapshot):
+    assert filter_books(snapshot, NO_RANGES, genres=[2, 3]) == (2, ['222', '333'])
+    assert filter_books(snapshot, NO_RANGES, genres=[9]) == (0, [])
+
+def test_sort_and_pages(snapshot):
+    assert filter_books(snapshot, NO_RANGES, sort='price', descending=True) == (4, ['444', '333', '111', '222'])
+    assert filter_books(snapshot, NO_RANGES, sort='year', page=2, per_page=3) == (4, ['444'])
+
+def test_rebuild_keeps_unchanged_rows(snapshot):
+    keep = snapshot.isbn != '111'
+    updated = build(snapshot, keep, [BookRow('111', 1.0, 1965, 412, 'P4')], [GenreRow('111', 4)])
+    assert filter_books(updated, ranges(price=(None, 5))) == (2, ['111', '222'])
+    assert filter_books(updated, NO_RANGES, genres=[1]) == (1, ['333'])
+    assert filter_books(updated, NO_RANGES, genres=[4], publishers=['P4']) == (1, ['111'])
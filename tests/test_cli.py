@@ -0,0 +1,17 @@
+from datetime import datetime, timedelta
+from models import db, Outbox
+
+def test_compact_outbox(app):
+    old = datetime.utcnow() - timedelta(days=30)
+    db.session.add_all([
+        Outbox(seq=1, tablename='book', pk='"111"', op='insert', data='{}', createdat=old),
+        Outbox(seq=2, tablename='book', pk='"111"', op='update', data='{}', createdat=old),
+    ])
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=['compact-outbox'])
+    assert result.exit_code == 0
+    assert result.output == '1 superseded outbox records removed\n'
+
+def test_rebuild_rollups(app):
+    result = app.test_cli_runner().invoke(args=['rebuild-rollups', '--from', '2024-01-01'])
+    assert (result.exit_code, result.output) == (0, 'Supply rollups rebuilt\n')
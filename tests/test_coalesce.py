@@ -0,0 +1,33 @@
+import threading
+import time
+from admission import ROUTE_CLASSES
+from coalesce import coalesced, flights
+from models import db, Book
+
+def test_followers_hold_no_connection(make_app, monkeypatch):
+    callers = 8
+    app = make_app(SQLALCHEMY_ENGINE_OPTIONS={'pool_size': 2, 'max_overflow': 0, 'pool_timeout': 1})
+
+    @coalesced('book')
+    def slow_count():
+        count = db.session.query(Book).count()
+        time.sleep(1.5)
+        return {'books': count}
+    app.add_url_rule('/slow', 'slow', slow_count)
+    # Classed like the coalesced search endpoints, so admission does not cap the callers
+    monkeypatch.setitem(ROUTE_CLASSES, 'slow', 'lookup')
+
+    barrier = threading.Barrier(callers)
+    statuses = []
+    def call():
+        client = app.test_client()
+        barrier.wait()
+        statuses.append(client.get('/slow').status_code)
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [200] * callers
+    assert flights.stats()['slow'] == {'leaders': 1, 'followers': callers - 1, 'fallbacks': 0, 'ratio': float(callers)}
@@ -0,0 +1,84 @@
+import gzip
+from collections import OrderedDict
+import pytest
+import compression
+from compression import negotiate
+
+@pytest.fixture
+def all_encoders(monkeypatch):
+    encoders = OrderedDict((name, None) for name in ('zstd', 'br', 'gzip'))
+    monkeypatch.setattr(compression, 'ENCODERS', encoders)
+
+@pytest.mark.parametrize('header, expected', [
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('gzip, deflate, br', 'br'),
+    ('gzip, br, zstd', 'zstd'),
+    ('zstd;q=0.5, br;q=0.8, gzip', 'gzip'),
+    ('br;q=0, gzip;q=0.1', 'gzip'),
+    ('*', 'zstd'),
+    ('*;q=0, gzip', 'gzip'),
+    ('gzip;q=abc', None),
+])
+def test_negotiate(all_encoders, header, expected):
+    assert negotiate(header) == expected
+
+@pytest.fixture
+def big(app):
+    app.add_url_rule('/big', 'big', lambda: {'rows': [{'n': n, 'text': 'x' * 20} for n in range(500)]})
+    return app.test_client()
+
+@pytest.fixture
+def gzip_calls(monkeypatch):
+    calls = []
+    def counting(level):
+        calls.append(level)
+        return compression.gzip_compressor(level)
+    monkeypatch.setitem(compression.ENCODERS, 'gzip', counting)
+    return calls
+
+def test_identity(big):
+    response = big.get('/big', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag']
+    assert 'Accept-Encoding' in response.vary
+
+def test_gzip_and_cache_hits(big, gzip_calls):
+    first = big.get('/big', headers={'Accept-Encoding': 'gzip'})
+    second = big.get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['ETag'].startswith('W/')
+    assert second.data == first.data
+    assert len(gzip.decompress(first.data)) > len(first.data)
+    assert gzip_calls == [6]
+    # A different query string is a different cache entry
+    big.get('/big?page=2', headers={'Accept-Encoding': 'gzip'})
+    assert len(gzip_calls) == 2
+
+def test_not_modified(big):
+    etag = big.get('/big').headers['ETag']
+    assert big.get('/big', headers={'If-None-Match': etag}).status_code == 304
+
+def test_small_bodies_are_not_compressed(client, books):
+    response = client.get('/books/search?keywords=dune', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+def test_bodies_larger_than_the_cache_are_not_kept(make_app, gzip_calls):
+    app = make_app(COMPRESS_CACHE_BYTES=100)
+    app.add_url_rule('/big', 'big', lambda: {'rows': [{'n': n, 'text': 'x' * 20} for n in range(500)]})
+    client = app.test_client()
+    for _ in range(2):
+        client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert len(gzip_calls) == 2
+
+@pytest.mark.parametrize('encoding, module', [('br', 'brotli'), ('zstd', 'zstandard')])
+def test_optional_encoders(big, encoding, module):
+    library = pytest.importorskip(module)
+    response = big.get('/big', headers={'Accept-Encoding': f'gzip, {encoding}'})
+    assert response.headers['Content-Encoding'] == encoding
+    if module == 'brotli':
+        body = library.decompress(response.data)
+    else:
+        body = library.ZstdDecompressor().decompressobj().decompress(response.data)
+    assert body.startswith(b'{"rows"')
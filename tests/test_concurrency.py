@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import update
+import app as app_module
+from app import versioned_delete
+from concurrency import ConflictError, compare_and_swap, parse_if_match
+from models import db, Book, Inventory
+
+def test_parse_if_match():
+    assert parse_if_match(None) is None
+    assert parse_if_match('*') is None
+    assert parse_if_match('"3"') == 3
+    assert parse_if_match('W/"4", "5"') == 4
+    with pytest.raises(ValueError):
+        parse_if_match('"abc"')
+
+def test_compare_and_swap_bumps_version(books):
+    assert compare_and_swap(Book, '111', price=1.0) == 2
+    assert compare_and_swap(Book, '111', 2, price=2.0) == 3
+    db.session.commit()
+    assert db.session.get(Book, '111').price == 2.0
+
+def test_compare_and_swap_wrong_version(books):
+    with pytest.raises(ConflictError):
+        compare_and_swap(Book, '111', 7, price=1.0)
+
+def test_compare_and_swap_missing_row(books):
+    assert compare_and_swap(Book, 'missing', price=1.0) is None
+    assert compare_and_swap(Book, 'missing', 1, price=1.0) is None
+
+def test_update_with_if_match(client, books):
+    response = client.put('/books/update/111', json={'price': 5.0}, headers={'If-Match': '"1"'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"2"'
+    response = client.put('/books/update/111', json={'price': 6.0}, headers={'If-Match': '"1"'})
+    assert response.status_code == 412
+
+def test_update_without_if_match(client, books):
+    response = client.put('/books/update/111', json={'price': 5.0})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == 2
+
+def test_update_missing_row(client, books):
+    assert client.put('/books/update/missing', json={'price': 5.0}).status_code == 404
+    response = client.put('/books/update/missing', json={'price': 5.0}, headers={'If-Match': '"1"'})
+    assert response.status_code == 404
+
+def test_update_invalid_if_match(client, books):
+    response = client.put('/books/update/111', json={'price': 5.0}, headers={'If-Match': 'abc'})
+    assert response.status_code == 400
+
+def test_update_with_if_match_any(client, books):
+    response = client.put('/books/update/111', json={'price': 5.0}, headers={'If-Match': '*'})
+    assert response.status_code == 200
+
+def transaction(client, if_match=None, wishlistitemid=1):
+    headers = {'If-Match': if_match} if if_match else {}
+    body = {'isbn': '111', 'price': 5.0, 'wishlistitemid': wishlistitemid, 'quantity': 1}
+    return client.post('/transaction', json=body, headers=headers)
+
+def test_transaction_if_match(client, books):
+    assert transaction(client, 'abc').status_code == 400
+    assert transaction(client, '"7"').status_code == 412
+    response = transaction(client, '"1"')
+    assert (response.status_code, response.get_json()['version']) == (200, 2)
+
+def test_transaction_conflict_with_if_match_any(client, books, monkeypatch):
+    def always_conflicts(*args, **kwargs):
+        raise ConflictError('book 111 was modified concurrently')
+    monkeypatch.setattr(app_module, 'compare_and_swap', always_conflicts)
+    monkeypatch.setitem(client.application.config, 'CONFLICT_BACKOFF', 0)
+    assert transaction(client, '*').status_code == 409
+    assert transaction(client).status_code == 409
+    assert transaction(client, '"1"').status_code == 412
+
+def test_inventory_delta(client, books):
+    db.session.add(Inventory(inventoryid=1, bookid='111', quantity=3))
+    db.session.commit()
+    assert client.put('/inventory', json={'inventoryid': 1, 'delta': -2}).status_code == 200
+    assert client.put('/inventory', json={'inventoryid': 1, 'delta': -2}).status_code == 409
+    assert client.put('/inventory', json={'inventoryid': 2, 'delta': 1}).status_code == 404
+    assert client.put('/inventory', json={'inventoryid': 1, 'delta': '1'}).status_code == 400
+    assert client.put('/inventory', json={'inventoryid': 1, 'delta': 1.5}).status_code == 400
+    db.session.expire_all()
+    assert db.session.get(Inventory, 1).quantity == 1
+
+def test_delete_of_stale_row(app, books):
+    book = db.session.get(Book, '111')
+    # A concurrent writer bumps the version behind the loaded object
+    db.session.execute(
+        update(Book).where(Book.isbn == '111').values(version=Book.version + 1),
+        execution_options={'synchronize_session': False},
+    )
+    with app.test_request_context():
+        response, status = versioned_delete(book, 'Book deleted successfully')
+    assert status == 409
@@ -0,0 +1,27 @@
+import random
+import pytest
+from contracts import IntervalTree
+
+def test_empty():
+    assert IntervalTree([]).stab(5) == []
+
+def test_closed_bounds():
+    tree = IntervalTree([(1, 5, 'a'), (5, 9, 'b'), (10, 10, 'c')])
+    assert sorted(tree.stab(0)) == []
+    assert sorted(tree.stab(1)) == ['a']
+    assert sorted(tree.stab(5)) == ['a', 'b']
+    assert sorted(tree.stab(9)) == ['b']
+    assert sorted(tree.stab(10)) == ['c']
+    assert sorted(tree.stab(11)) == []
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_linear_scan(seed):
+    rng = random.Random(seed)
+    intervals = []
+    for label in range(200):
+        start = rng.randrange(0, 1000)
+        intervals.append((start, start + rng.randrange(0, 100), label))
+    tree = IntervalTree(intervals)
+    for point in range(-5, 1105, 7):
+        expected = sorted(label for start, end, label in intervals if start <= point <= end)
+        assert sorted(tree.stab(point)) == expected
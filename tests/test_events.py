@@ -0,0 +1,41 @@
+import pytest
+import app as app_module
+import events
+from events import LocalBroker, OutboxRelay
+from models import db, Book
+
+@pytest.fixture
+def relay(app, monkeypatch):
+    app.config.update(EVENTS_HEARTBEAT=0.1, CHANGES_POLL_INTERVAL=0.05)
+    relay = OutboxRelay(LocalBroker())
+    monkeypatch.setattr(events, 'relay', relay)
+    monkeypatch.setattr(app_module, 'relay', relay)
+    monkeypatch.setattr(app_module, 'broker', relay.broker)
+    return relay
+
+def next_event(chunks):
+    for chunk in chunks:
+        chunk = chunk.decode()
+        if chunk.startswith('id:'):
+            return chunk
+
+def test_new_subscriber_starts_at_the_head(client, books, relay):
+    # The books were written moments ago, inside OUTBOX_MAX_TRANSACTION_AGE, so
+    # the relay starts before them; a new subscriber must not be sent them
+    response = client.get('/events?topic=isbn:111', buffered=False)
+    chunks = response.response
+    assert next(chunks).startswith(b'retry:')
+    assert next(chunks) == b': heartbeat\n\n'
+
+    db.session.get(Book, '111').price = 1.5
+    db.session.commit()
+    event = next_event(chunks)
+    assert '"price": 1.5' in event
+    assert int(event.split()[1]) == relay.seq
+    response.close()
+
+def test_resume_replays_from_last_event_id(client, books, relay):
+    response = client.get('/events?topic=isbn:222', headers={'Last-Event-ID': '0'}, buffered=False)
+    event = next_event(response.response)
+    assert '"isbn": "222"' in event
+    response.close()
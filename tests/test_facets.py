@@ -0,0 +1,43 @@
+from sqlalchemy.dialects import postgresql
+from facets import FACETS, book_conditions, facet_expressions, grouping_sets_statement
+from models import db, BookBookGenre, BookGenre
+
+EDGES = [0, 10, 20, 30, 50, 100]
+
+def add_genres():
+    db.session.add_all([
+        BookGenre(genreid=1, genretype='SF', genredescription='Science fiction'),
+        BookGenre(genreid=2, genretype='Classic', genredescription='Classics'),
+        BookBookGenre(isbn='111', genreid=1),
+        BookBookGenre(isbn='111', genreid=2),
+        BookBookGenre(isbn='333', genreid=1),
+    ])
+    db.session.commit()
+
+def test_facet_counts(client, books):
+    add_genres()
+    assert client.get('/books/facets').get_json() == {
+        'genre': {'1': 2, '2': 1},
+        'publisher': {'P1': 3},
+        'price': {'0': 2, '10': 1},
+        'decade': {'1810': 1, '1960': 2},
+    }
+
+def test_facets_follow_the_filter(client, books):
+    add_genres()
+    response = client.get('/books/facets?facets=genre,price&price_min=5')
+    assert response.get_json() == {'genre': {'1': 2, '2': 1}, 'price': {'0': 1, '10': 1}}
+    response = client.get('/books/facets?facets=decade&genre=2')
+    assert response.get_json() == {'decade': {'1960': 1}}
+
+def test_unknown_facets(client, books):
+    assert client.get('/books/facets?facets=colour').status_code == 400
+
+def test_grouping_sets_statement(app):
+    stmt = grouping_sets_statement(FACETS, book_conditions({'price': (5, None)}, [], []), facet_expressions(EDGES))
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}))
+    assert 'GROUP BY GROUPING SETS((bookbookgenre.genreid), (book.idpublisher), (CASE' in sql
+    assert 'grouping(bookbookgenre.genreid) AS grouping_genre' in sql
+    assert 'count(DISTINCT book.isbn) AS total' in sql
+    assert 'LEFT OUTER JOIN bookbookgenre' in sql
+    assert 'book.price >= 5' in sql
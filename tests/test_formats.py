@@ -0,0 +1,26 @@
+import pytest
+
+def test_json_by_default(client, books):
+    response = client.get('/books')
+    assert response.mimetype == 'application/json'
+    assert sorted(book['isbn'] for book in response.get_json()) == ['111', '222', '333']
+    assert 'Accept' in response.vary
+
+def test_unsupported_format(client, books):
+    assert client.get('/books', headers={'Accept': 'text/csv'}).status_code == 406
+
+def test_msgpack(client, books):
+    msgpack = pytest.importorskip('msgpack')
+    response = client.get('/books', headers={'Accept': 'application/msgpack'})
+    assert response.mimetype == 'application/msgpack'
+    assert sorted(book['isbn'] for book in msgpack.unpackb(response.data)) == ['111', '222', '333']
+
+def test_arrow_batches(app, client, books):
+    pyarrow = pytest.importorskip('pyarrow')
+    app.config['ARROW_BATCH_ROWS'] = 2
+    response = client.get('/books', headers={'Accept': 'application/vnd.apache.arrow.stream'})
+    reader = pyarrow.ipc.open_stream(response.data)
+    batches = list(reader)
+    assert [batch.num_rows for batch in batches] == [2, 1]
+    assert reader.schema.field('price').type == pyarrow.float64()
+    assert sorted(pyarrow.Table.from_batches(batches).column('isbn').to_pylist()) == ['111', '222', '333']
@@ -0,0 +1,99 @@
+import logging
+from datetime import datetime, timedelta
+import pytest
+import outbox
+from outbox import follow, open_gaps, settled_seq
+from models import db, Outbox
+
+MAX_AGE = 60
+
+@pytest.fixture(autouse=True)
+def no_held_gaps():
+    outbox.held_gaps.clear()
+    yield
+    outbox.held_gaps.clear()
+
+def add(seq, age, tablename='book'):
+    db.session.add(Outbox(
+        seq=seq, tablename=tablename, pk=f'"{seq}"', op='update', data='{}',
+        createdat=datetime.utcnow() - timedelta(seconds=age),
+    ))
+    db.session.commit()
+
+def seqs(changes):
+    return [change['seq'] for change in changes]
+
+def test_contiguous(app):
+    for seq in (1, 2, 3):
+        add(seq, 0)
+    changes, position = follow(0, 100, MAX_AGE)
+    assert (seqs(changes), position) == ([1, 2, 3], 3)
+    assert follow(3, 100, MAX_AGE) == ([], 3)
+
+def test_limit(app):
+    for seq in (1, 2, 3):
+        add(seq, 0)
+    changes, position = follow(0, 2, MAX_AGE)
+    assert (seqs(changes), position) == ([1, 2], 2)
+
+def test_held_at_a_young_gap(app, caplog):
+    add(1, 0)
+    add(3, 0)
+    with caplog.at_level(logging.WARNING):
+        changes, position = follow(0, 100, MAX_AGE)
+    assert (seqs(changes), position) == ([1], 1)
+    assert [gap['seq'] for gap in open_gaps()] == [2]
+    assert 'held at seq 2' in caplog.text
+
+def test_gap_filled_by_a_late_commit(app, caplog):
+    add(1, 0)
+    add(3, 0)
+    follow(0, 100, MAX_AGE)
+    add(2, 0)
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        changes, position = follow(1, 100, MAX_AGE)
+    assert (seqs(changes), position) == ([2, 3], 3)
+    assert open_gaps() == []
+    assert 'never committed' not in caplog.text
+
+def test_gap_given_up_after_max_age(app, caplog):
+    add(1, 0)
+    add(3, 0)
+    follow(0, 100, MAX_AGE)
+    with caplog.at_level(logging.WARNING):
+        # Once the record after the gap is older than max_age
+        changes, position = follow(1, 100, 0)
+    assert (seqs(changes), position) == ([3], 3)
+    assert open_gaps() == []
+    assert 'seq 2 never committed' in caplog.text
+
+def test_old_gaps_are_skipped_silently(app, caplog):
+    add(1, 120)
+    add(4, 90)
+    add(5, 0)
+    with caplog.at_level(logging.WARNING):
+        changes, position = follow(0, 100, MAX_AGE)
+    assert (seqs(changes), position) == ([1, 4, 5], 5)
+    assert caplog.text == ''
+
+def test_tables_filter_advances_position(app):
+    add(1, 0, 'book')
+    add(2, 0, 'inventory')
+    add(3, 0, 'inventory')
+    changes, position = follow(0, 100, MAX_AGE, tables=('book',))
+    assert (seqs(changes), position) == ([1], 3)
+
+def test_settled_seq(app):
+    assert settled_seq(MAX_AGE) == 0
+    add(1, 300)
+    add(2, 120)
+    add(3, 10)
+    assert settled_seq(MAX_AGE) == 2
+    assert settled_seq(5) == 3
+
+def test_gaps_endpoint(client, app):
+    add(1, 0)
+    add(3, 0)
+    follow(0, 100, MAX_AGE)
+    assert [gap['seq'] for gap in client.get('/outbox/gaps').get_json()] == [2]
@@ -0,0 +1,64 @@
+from datetime import date
+import pytest
+from sqlalchemy.dialects import postgresql
+from models import db, BookReviews, Customer, CustomerFeedback, OnlineAccount, Wishlist, WishlistItems
+from profiles import profile_sql
+
+@pytest.fixture
+def customers(books):
+    db.session.add_all([
+        Customer(customernumber=1, customername='Ada', customeraddress='London'),
+        Customer(customernumber=2, customername='Bo', customeraddress='Oslo'),
+        OnlineAccount(accountid=10, customernumber=1, customeremail='ada@example.com', username='ada', password='x', accountstatus='active'),
+        BookReviews(reviewid=1, isbn='111', customernumber=1, rating=5, reviewdate=date(2024, 1, 1)),
+        BookReviews(reviewid=2, isbn='222', customernumber=1, rating=3, reviewdate=date(2024, 3, 1)),
+        BookReviews(reviewid=3, isbn='333', customernumber=1, rating=4, reviewdate=date(2024, 2, 1)),
+        CustomerFeedback(feedbackid=1, customernumber=1, feedbackdate=date(2024, 4, 1), feedbacktext='Great'),
+        Wishlist(wishlistitemid=1, customernumber=1, totalprice=14.49, wishlistquantity=2),
+        WishlistItems(wishlistitemid=1, isbn='222', quantity=1),
+        WishlistItems(wishlistitemid=1, isbn='111', quantity=1),
+    ])
+    db.session.commit()
+
+def test_batched_profiles(client, customers):
+    response = client.post('/customers/profiles?reviews_limit=2', json={'customernumbers': [2, 1, 99]})
+    assert response.status_code == 200
+    ada, bo = response.get_json()
+    assert (ada['customernumber'], bo['customernumber']) == (1, 2)
+    assert ada['accounts'] == [{'accountid': 10, 'customeremail': 'ada@example.com', 'username': 'ada', 'accountstatus': 'active'}]
+    assert 'password' not in ada['accounts'][0]
+    assert [review['reviewid'] for review in ada['reviews']] == [2, 3]
+    assert ada['feedback'] == [{'feedbackid': 1, 'feedbackdate': '2024-04-01', 'feedbacktext': 'Great'}]
+    assert ada['wishlist'] == [{
+        'wishlistitemid': 1, 'totalprice': 14.49, 'wishlistquantity': 2,
+        'items': [{'isbn': '111', 'quantity': 1}, {'isbn': '222', 'quantity': 1}],
+    }]
+    assert {name: bo[name] for name in ('accounts', 'reviews', 'feedback', 'wishlist')} == {
+        'accounts': [], 'reviews': [], 'feedback': [], 'wishlist': [],
+    }
+
+def test_single_profile(client, customers):
+    assert client.get('/customers/1/profile').get_json()['customername'] == 'Ada'
+    assert client.get('/customers/99/profile').status_code == 404
+
+@pytest.mark.parametrize('body', [
+    [1, 2],
+    {'customernumbers': 1},
+    {'customernumbers': '1,2'},
+    {'customernumbers': [1, '2']},
+    {'customernumbers': [True]},
+])
+def test_batched_profiles_reject_bad_input(client, customers, body):
+    assert client.post('/customers/profiles', json=body).status_code == 400
+
+def test_batch_limit(client, app, customers):
+    app.config['PROFILE_MAX_BATCH'] = 2
+    assert client.post('/customers/profiles', json={'customernumbers': [1, 2, 3]}).status_code == 400
+    assert client.post('/customers/profiles', json={'customernumbers': []}).get_json() == []
+
+def test_postgres_sql_orders_inside_the_aggregate(app):
+    limits = {'accounts': 20, 'reviews': 20, 'feedback': 20, 'wishlist': 50}
+    sql = str(profile_sql('postgresql', limits).compile(dialect=postgresql.dialect()))
+    assert "json_agg(json_build_object('reviewid', s.reviewid" in sql
+    assert 'ORDER BY s.reviewdate DESC, s.reviewid DESC)' in sql
+    assert "coalesce(json_agg" in sql and "'[]'::json" in sql
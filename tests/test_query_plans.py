@@ -0,0 +1,37 @@
+from datetime import date, datetime, timedelta
+import pytest
+from sqlalchemy import text
+from benchmarks.query_plans import ACCESS_PATHS, plan, uses_index
+from models import db
+
+ROWS = 200
+
+# Row i of any table: distinct keys, and foreign keys spread over ten parents
+def value(column, i):
+    python_type = column.type.python_type
+    n = i if column.primary_key else i % 10
+    if python_type is int:
+        return n
+    if python_type is float:
+        return n + 0.5
+    if python_type is date:
+        return date(2024, 1, 1) + timedelta(days=n)
+    if python_type is datetime:
+        return datetime(2024, 1, 1) + timedelta(hours=n)
+    return str(n)
+
+@pytest.fixture
+def seeded(app):
+    for table in {db.metadata.tables[name] for _, name, _ in ACCESS_PATHS}:
+        db.session.execute(table.insert(), [
+            {column.name: value(column, i) for column in table.columns} for i in range(ROWS)
+        ])
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    return app
+
+@pytest.mark.parametrize('name, table, sql', ACCESS_PATHS, ids=[name for name, _, _ in ACCESS_PATHS])
+def test_access_path_uses_index(seeded, name, table, sql):
+    with db.engine.connect() as conn:
+        explained = plan(conn, sql)
+    assert uses_index(conn.dialect.name, table, explained), explained
@@ -0,0 +1,30 @@
+from datetime import date
+from models import db, Contracts, Inventory, SupplierBooks
+from reorder import compute_batch, eligible_suppliers
+
+SETTINGS = {'lead_days': 7, 'safety_days': 3, 'cover_days': 30}
+TODAY = date(2024, 6, 1)
+
+def test_supplier_choice(books):
+    # Suppliers 3, 4, 5 and 7 list every book and hold a contract with its publisher
+    for supplierid in (3, 4, 5, 7):
+        db.session.add(Contracts(
+            contractid=supplierid, supplierid=supplierid, idpublisher='P1',
+            startdate=date(2024, 1, 1), enddate=date(2024, 12, 31), contractdetails='',
+        ))
+        db.session.add_all(SupplierBooks(supplierid=supplierid, isbn=isbn) for isbn in ('111', '222', '333'))
+    db.session.add_all([
+        Inventory(inventoryid=1, storeid=1, bookid='111', supplierid=7, quantity=0),
+        Inventory(inventoryid=2, storeid=1, bookid='111', supplierid=5, quantity=0),
+        Inventory(inventoryid=3, storeid=1, bookid='222', supplierid=9, quantity=0),
+        Inventory(inventoryid=4, storeid=1, bookid='333', supplierid=7, quantity=0),
+        Inventory(inventoryid=5, storeid=1, bookid=None, supplierid=7, quantity=0),
+    ])
+    db.session.commit()
+
+    rates = {(1, 5): 1.0, (1, 7): 1.0, (1, 9): 1.0}
+    suggestions = compute_batch([1], rates, eligible_suppliers(TODAY), SETTINGS, TODAY)
+    chosen = {suggestion['isbn']: suggestion['supplierid'] for suggestion in suggestions}
+    # Current suppliers are kept when eligible (the lowest of several), else
+    # the lowest eligible one; inventory without a book is skipped
+    assert chosen == {'111': 5, '222': 3, '333': 7}
@@ -0,0 +1,32 @@
+from datetime import date
+from models import db, CustomerFeedback
+from trending import rebuild_feedback_terms, record_feedback, terms, trending_terms
+
+def test_pairs_skip_stopwords():
+    assert terms('The delivery of the book') == {'delivery', 'book'}
+    assert terms('great book of the year') == {'great', 'book', 'great book', 'year'}
+
+def test_negations_form_pairs():
+    assert terms('Not good') == {'good', 'not good'}
+    assert terms("wasn't worth it, no refund") == {'worth', "wasn't worth", 'refund', 'no refund'}
+    assert terms("Don't buy") == {'buy', "don't buy"}
+
+def test_pairs_stop_at_punctuation():
+    assert terms('Fast. Cheap') == {'fast', 'cheap'}
+
+def test_counts_once_per_feedback(app):
+    feedback = [
+        CustomerFeedback(feedbackid=1, feedbackdate=date(2024, 6, 3), feedbacktext='Not good, not good at all'),
+        CustomerFeedback(feedbackid=2, feedbackdate=date(2024, 6, 5), feedbacktext='Good book'),
+        CustomerFeedback(feedbackid=3, feedbackdate=date(2024, 5, 29), feedbacktext='Good'),
+    ]
+    db.session.add_all(feedback)
+    for item in feedback:
+        record_feedback(item)
+    db.session.commit()
+    incremental = trending_terms(date(2024, 6, 3), 10)
+    assert incremental['documents'] == 2
+    assert incremental['terms'][0] == {'term': 'good', 'documents': 2, 'previous': 1, 'change': 1}
+
+    rebuild_feedback_terms()
+    assert trending_terms(date(2024, 6, 3), 10) == incremental
@@ -0,0 +1,129 @@
+import re
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from sqlalchemy import and_, func, select
+from analytics import as_date, insert_for
+from models import db, CustomerFeedback, FeedbackTerms, FeedbackWeeks
+
+# Trending feedback terms: each feedback text is tokenized once, when it is
+# written (or by the backfill), into lowercase words and adjacent word pairs
+# that contain no stopword. Every term counts once per feedback, and the counts
+# are kept exactly per ISO week, so a week's top terms are an indexed read of
+# the counters rather than a scan of the raw text.
+
+TOKEN = re.compile(r"[a-z][a-z']+")
+CLAUSE = re.compile(r'[.,;:!?()"\n]+')
+STOPWORDS = frozenset('''
+    a about after again all also am an and any are as at be because been before being but by can
+    could did do does doing for from had has have having he he's her here hers him his how i i'd
+    i'll i'm i've if in into is it it's its just me more most my of off on once only or other our
+    out over own same she she's should so some such than that that's the their them then there
+    there's these they they're this those through to too under until up very was we we're were
+    what when where which while who why will with would you you're your
+'''.split())
+# Negators are not stopwords: they carry the meaning of the pair they start
+# ("not worth", "wasn't good"), but are too common to trend on their own
+NEGATORS = frozenset(('no', 'nor', 'not', 'never'))
+
+def is_negator(word):
+    return word in NEGATORS or word.endswith("n't")
+
+def week_of(day):
+    day = as_date(day)
+    return day - timedelta(days=day.weekday())
+
+# Pairs are formed from the unfiltered word sequence of each clause, so words
+# that were never adjacent do not pair up across a removed stopword or a
+# punctuation mark
+def terms(text):
+    found = set()
+    for clause in CLAUSE.split(text.lower()):
+        words = [word.strip("'") for word in TOKEN.findall(clause)]
+        usable = [word not in STOPWORDS and (len(word) > 2 or is_negator(word)) for word in words]
+        found.update(word for word, ok in zip(words, usable) if ok and not is_negator(word))
+        found.update(
+            f'{words[i]} {words[i + 1]}' for i in range(len(words) - 1) if usable[i] and usable[i + 1]
+        )
+    return found
+
+def upsert_counts(week, counts, documents):
+    if counts:
+        stmt = insert_for(FeedbackTerms)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['week', 'term'],
+            set_={'documents': FeedbackTerms.__table__.c.documents + stmt.excluded.documents},
+        )
+        db.session.execute(stmt, [{'week': week, 'term': term, 'documents': n} for term, n in counts.items()])
+    stmt = insert_for(FeedbackWeeks).values(week=week, documents=documents)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['week'], set_={'documents': FeedbackWeeks.__table__.c.documents + stmt.excluded.documents},
+    )
+    db.session.execute(stmt)
+
+# Incremental maintenance, called by the customerfeedback write paths inside
+# their transaction: sign=1 for the new state of a feedback, sign=-1 for the old one.
+def record_feedback(feedback, sign=1):
+    counts = Counter({term: sign for term in terms(feedback.feedbacktext)})
+    upsert_counts(week_of(feedback.feedbackdate), counts, sign)
+
+# Bulk rebuild for backfills. Feedback is streamed in batches and each batch's
+# counts are merged into the counters, so memory stays bounded by the batch and
+# the vocabulary of the weeks it touches. The range is widened to whole weeks.
+def rebuild_feedback_terms(start=None, end=None, batch=1000):
+    feedback = CustomerFeedback.__table__
+    conditions = {'terms': [], 'weeks': [], 'feedback': []}
+    if start is not None:
+        start = week_of(start)
+        conditions['terms'].append(FeedbackTerms.week >= start)
+        conditions['weeks'].append(FeedbackWeeks.week >= start)
+        conditions['feedback'].append(feedback.c.feedbackdate >= start)
+    if end is not None:
+        end = week_of(end) + timedelta(days=6)
+        conditions['terms'].append(FeedbackTerms.week <= end)
+        conditions['weeks'].append(FeedbackWeeks.week <= end)
+        conditions['feedback'].append(feedback.c.feedbackdate <= end)
+
+    db.session.execute(FeedbackTerms.__table__.delete().where(*conditions['terms']))
+    db.session.execute(FeedbackWeeks.__table__.delete().where(*conditions['weeks']))
+    stmt = (
+        select(feedback.c.feedbackdate, feedback.c.feedbacktext)
+        .where(*conditions['feedback'])
+        .execution_options(yield_per=batch)
+    )
+    # A separate connection keeps the server-side cursor open while the
+    # session's connection writes the counters
+    with db.engine.connect() as reader:
+        for rows in reader.execute(stmt).partitions():
+            counts, documents = defaultdict(Counter), Counter()
+            for feedbackdate, text in rows:
+                week = week_of(feedbackdate)
+                counts[week].update(terms(text))
+                documents[week] += 1
+            for week, n in documents.items():
+                upsert_counts(week, counts[week], n)
+    db.session.commit()
+
+# The week's most frequent terms with their count the week before
+def trending_terms(week, top):
+    current, previous = FeedbackTerms.__table__, FeedbackTerms.__table__.alias('previous')
+    stmt = (
+        select(current.c.term, current.c.documents, func.coalesce(previous.c.documents, 0).label('previous'))
+        .outerjoin(previous, and_(previous.c.term == current.c.term, previous.c.week == week - timedelta(days=7)))
+        .where(current.c.week == week, current.c.documents > 0)
+        .order_by(current.c.documents.desc(), current.c.term)
+        .limit(top)
+    )
+    documents = db.session.execute(
+        select(FeedbackWeeks.documents).where(FeedbackWeeks.week == week)
+    ).scalar() or 0
+    return {
+        'week': week.isoformat(),
+        'documents': documents,
+        'terms': [
+            {'term': term, 'documents': count, 'previous': before, 'change': count - before}
+            for term, count, before in db.session.execute(stmt)
+        ],
+    }
+
+def current_week():
+    return week_of(date.today())
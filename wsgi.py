@@ -0,0 +1,7 @@
+from app import create_app, warm_up
+
+# Production entry point, loaded once in the gunicorn master (preload_app) so
+# workers fork from an already imported and warmed application:
+#   gunicorn -c gunicorn.conf.py wsgi:app
+app = create_app()
+warm_up(app)